@@ -5,12 +5,28 @@ from datetime import datetime
 import numpy as np
 from collections import deque
 from config import TradingConfig
+from utils.sample_buffer import SampleBuffer
+from utils.rolling_stats import RollingStd
+from analysis.microstructure_kernels import order_velocity, side_volumes
+
+# Record layout for batched trade ingestion (side: +1 buy, -1 sell, 0 unknown)
+TRADE_DTYPE = np.dtype([('timestamp', 'f8'), ('price', 'f8'), ('size', 'f8'), ('side', 'i1')])
+SIDE_CODES = {'B': 1, 'A': -1}
+
+def trades_to_array(trades: List[Dict]) -> np.ndarray:
+    """Pack standard-format trade dicts into one TRADE_DTYPE array"""
+    side_code = SIDE_CODES.get
+    return np.array(
+        [(t.get('timestamp', 0), t.get('price', 0), t.get('size', 0), side_code(t.get('side', ''), 0))
+         for t in trades],
+        dtype=TRADE_DTYPE
+    )
 
 @dataclass
 class OrderbookSnapshot:
     timestamp: float
-    bids: List[List[float]]  # [[price, size], ...]
-    asks: List[List[float]]  # [[price, size], ...]
+    bids: np.ndarray  # (levels, 2) float64 rows of [price, size]
+    asks: np.ndarray  # (levels, 2) float64 rows of [price, size]
     mid_price: float
     spread: float
     spread_pct: float
@@ -61,7 +77,20 @@ class MarketMicrostructure:
         
         # Data storage
         self.orderbook_history = deque(maxlen=config.ORDERBOOK_HISTORY_SIZE)
-        self.trade_history = deque(maxlen=config.TRADE_HISTORY_SIZE)
+        # Per-snapshot depths kept alongside orderbook_history for the kernels
+        self._bid_depths = SampleBuffer(maxlen=config.ORDERBOOK_HISTORY_SIZE, running_stats=False)
+        self._ask_depths = SampleBuffer(maxlen=config.ORDERBOOK_HISTORY_SIZE, running_stats=False)
+        # Spread volatility over the newest spreads, updated per snapshot
+        self._spread_std = RollingStd(min(config.SPREAD_VOLATILITY_WINDOW, config.ORDER_VELOCITY_WINDOW))
+        
+        # Trade history as parallel preallocated columns (oldest first); side
+        # uses the TRADE_DTYPE codes (+1 aggressive buy, -1 aggressive sell,
+        # 0 unknown). Statistics are taken over windows, so no running stats
+        history_size = config.TRADE_HISTORY_SIZE
+        self._trade_ts = SampleBuffer(maxlen=history_size, running_stats=False)
+        self._trade_prices = SampleBuffer(maxlen=history_size, running_stats=False)
+        self._trade_sizes = SampleBuffer(maxlen=history_size, running_stats=False)
+        self._trade_sides = SampleBuffer(dtype=np.int8, maxlen=history_size, running_stats=False)
         
         # Current state
         self.current_signals = MarketSignals(
@@ -93,6 +122,9 @@ class MarketMicrostructure:
         # Create snapshot
         snapshot = self._create_orderbook_snapshot(orderbook)
         self.orderbook_history.append(snapshot)
+        self._bid_depths.append(snapshot.bid_depth)
+        self._ask_depths.append(snapshot.ask_depth)
+        self._spread_std.push(snapshot.spread_pct)
         
         print(f"   - Mid price: ${snapshot.mid_price:.5f}")
         print(f"   - Spread: {snapshot.spread_pct:.3f}%")
@@ -124,36 +156,73 @@ class MarketMicrostructure:
             
         print(f"💹 Processing {len(trades)} new trades...")
         
-        new_events = []
-        for trade in trades:
-            event = self._create_trade_event(trade)
-            if event:
-                self.trade_history.append(event)
-                new_events.append(event)
-        
+        new_events = [event for event in map(self._create_trade_event, trades) if event]
         if new_events:
+            self.add_trade_events_np(np.array(
+                [(e.timestamp, e.price, e.size, SIDE_CODES.get(e.side, 0)) for e in new_events],
+                dtype=TRADE_DTYPE
+            ))
             print(f"   - Added {len(new_events)} trade events")
             print(f"   - Latest trade: ${new_events[-1].price:.5f} size={new_events[-1].size:.2f} side={new_events[-1].side}")
-            print(f"   - Trade history size: {len(self.trade_history)}")
-            
-            # Update trade statistics
-            self._update_trade_statistics()
-            self._maybe_update_analysis()
+            print(f"   - Trade history size: {self.trade_count}")
+    
+    def add_trade_events_np(self, trades: np.ndarray):
+        """Add a batch of trades packed by trades_to_array
+        
+        Each column is appended to its history buffer in one copy; no
+        per-trade objects are created.
+        """
+        if not len(trades):
+            return
+        
+        self._trade_ts.extend(trades['timestamp'])
+        self._trade_prices.extend(trades['price'])
+        self._trade_sizes.extend(trades['size'])
+        self._trade_sides.extend(trades['side'])
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Added %d trade events (history: %d)", len(trades), self.trade_count)
+        
+        self._update_trade_statistics()
+        self._maybe_update_analysis()
+    
+    @property
+    def trade_count(self) -> int:
+        """Number of trades currently held in the history"""
+        return len(self._trade_sizes)
+    
+    def recent_trades(self, n: int) -> List[Dict]:
+        """Last n trades as standard-format dicts, oldest first"""
+        return [
+            {'price': price, 'size': size, 'side': 'B' if side > 0 else 'A', 'timestamp': ts}
+            for ts, price, size, side in zip(
+                self._trade_ts[-n:].tolist(), self._trade_prices[-n:].tolist(),
+                self._trade_sizes[-n:].tolist(), self._trade_sides[-n:].tolist()
+            )
+        ]
     
     def _create_orderbook_snapshot(self, orderbook: Dict) -> OrderbookSnapshot:
-        """Convert raw orderbook to structured snapshot"""
-        bids = orderbook['bids']
-        asks = orderbook['asks']
+        """Convert raw orderbook to structured snapshot
         
-        best_bid = bids[0][0] if bids else 0
-        best_ask = asks[0][0] if asks else 0
+        Levels are stored as (levels, 2) float64 arrays, converted once here.
+        """
+        bids = np.asarray(orderbook['bids'], dtype=np.float64).reshape(-1, 2)
+        asks = np.asarray(orderbook['asks'], dtype=np.float64).reshape(-1, 2)
+        
+        best_bid = float(bids[0, 0]) if len(bids) else 0
+        best_ask = float(asks[0, 0]) if len(asks) else 0
         mid_price = (best_bid + best_ask) / 2 if best_bid and best_ask else 0
         spread = best_ask - best_bid if best_bid and best_ask else 0
         spread_pct = (spread / mid_price * 100) if mid_price > 0 else 0
         
         # Calculate depth in top N levels
-        bid_depth = sum(bid[1] for bid in bids[:self.config.IMBALANCE_DEPTH_LEVELS])
-        ask_depth = sum(ask[1] for ask in asks[:self.config.IMBALANCE_DEPTH_LEVELS])
+        depth_levels = self.config.IMBALANCE_DEPTH_LEVELS
+        if 'bid_vol' in orderbook and 'ask_vol' in orderbook:
+            bid_depth = float(orderbook['bid_vol'][:depth_levels].sum())
+            ask_depth = float(orderbook['ask_vol'][:depth_levels].sum())
+        else:
+            bid_depth = float(bids[:depth_levels, 1].sum())
+            ask_depth = float(asks[:depth_levels, 1].sum())
         
         return OrderbookSnapshot(
             timestamp=orderbook.get('timestamp', datetime.now().timestamp()),
@@ -209,7 +278,7 @@ class MarketMicrostructure:
         self._calculate_combined_signals()
         
         self.current_signals.timestamp = datetime.now().timestamp()
-        self.current_signals.sample_size = len(self.trade_history)
+        self.current_signals.sample_size = self.trade_count
         
         print(f"   ✅ Analysis complete - Flow confidence: {self.current_signals.flow_confidence:.3f}")
     
@@ -231,9 +300,9 @@ class MarketMicrostructure:
         
         # Depth pressure (comparing recent snapshots)
         if len(self.orderbook_history) >= 5:
-            recent_snapshots = list(self.orderbook_history)[-5:]
-            bid_depth_change = (recent_snapshots[-1].bid_depth - recent_snapshots[0].bid_depth) / recent_snapshots[0].bid_depth
-            ask_depth_change = (recent_snapshots[-1].ask_depth - recent_snapshots[0].ask_depth) / recent_snapshots[0].ask_depth
+            first_snapshot = self.orderbook_history[-5]
+            bid_depth_change = (current_snapshot.bid_depth - first_snapshot.bid_depth) / first_snapshot.bid_depth
+            ask_depth_change = (current_snapshot.ask_depth - first_snapshot.ask_depth) / first_snapshot.ask_depth
             
             depth_pressure = ask_depth_change - bid_depth_change  # Positive = asks depleting faster
             self.current_signals.depth_pressure = max(-1.0, min(1.0, depth_pressure))
@@ -244,17 +313,18 @@ class MarketMicrostructure:
     
     def _detect_large_orders(self):
         """Detect large orders in recent trades"""
-        if not self.trade_history or not self.trade_size_stats.get('mean'):
+        if not self.trade_count or not self.trade_size_stats.get('mean'):
             return
         
-        recent_trades = list(self.trade_history)[-10:]  # Last 10 trades
-        large_order_signal = 0.0
+        # Last 10 trades
+        sizes = self._trade_sizes[-10:]
+        sides = self._trade_sides[-10:]
+        large_threshold = self.trade_size_stats['mean'] * self.config.LARGE_ORDER_THRESHOLD
         
-        for trade in recent_trades:
-            if trade.size > self.trade_size_stats['mean'] * self.config.LARGE_ORDER_THRESHOLD:
-                weight = min(trade.size / (self.trade_size_stats['mean'] * self.config.LARGE_ORDER_THRESHOLD), 3.0)
-                direction = 1.0 if trade.is_aggressive_buy else -1.0
-                large_order_signal += direction * weight
+        large = sizes > large_threshold
+        weights = np.minimum(sizes[large] / large_threshold, 3.0)
+        directions = np.where(sides[large] > 0, 1.0, -1.0)
+        large_order_signal = float(np.dot(directions, weights))
         
         # Normalize
         self.current_signals.large_order_flow = max(-1.0, min(1.0, large_order_signal / 10.0))
@@ -267,26 +337,17 @@ class MarketMicrostructure:
         if len(self.orderbook_history) < self.config.ORDER_VELOCITY_WINDOW:
             return
         
-        recent_snapshots = list(self.orderbook_history)[-self.config.ORDER_VELOCITY_WINDOW:]
+        window = self.config.ORDER_VELOCITY_WINDOW
         
         # Order velocity (simplified - measuring depth changes as proxy)
-        depth_changes = []
-        for i in range(1, len(recent_snapshots)):
-            prev = recent_snapshots[i-1]
-            curr = recent_snapshots[i]
-            
-            bid_change = abs(curr.bid_depth - prev.bid_depth) / max(prev.bid_depth, 0.001)
-            ask_change = abs(curr.ask_depth - prev.ask_depth) / max(prev.ask_depth, 0.001)
-            depth_changes.append(bid_change + ask_change)
-        
-        if depth_changes:
-            self.current_signals.order_velocity = np.mean(depth_changes)
+        velocity = order_velocity(self._bid_depths[-window:], self._ask_depths[-window:])
+        if not np.isnan(velocity):
+            self.current_signals.order_velocity = velocity
             print(f"      Order velocity: {self.current_signals.order_velocity:.4f}")
         
-        # Spread volatility
-        spreads = [s.spread_pct for s in recent_snapshots[-self.config.SPREAD_VOLATILITY_WINDOW:]]
-        if len(spreads) > 1:
-            self.current_signals.spread_volatility = np.std(spreads)
+        # Spread volatility (window is full once ORDER_VELOCITY_WINDOW snapshots exist)
+        if self.config.SPREAD_VOLATILITY_WINDOW > 1:
+            self.current_signals.spread_volatility = self._spread_std.std
             print(f"      Spread volatility: {self.current_signals.spread_volatility:.4f}%")
         
         # Level stickiness (simplified implementation)
@@ -302,12 +363,12 @@ class MarketMicrostructure:
         
         # Count how often price levels appear in top of book
         for snapshot in recent_snapshots:
-            if snapshot.bids:
-                best_bid = round(snapshot.bids[0][0], 2)  # Round to avoid floating point issues
+            if len(snapshot.bids):
+                best_bid = round(float(snapshot.bids[0, 0]), 2)  # Round to avoid floating point issues
                 price_touches[best_bid] = price_touches.get(best_bid, 0) + 1
             
-            if snapshot.asks:
-                best_ask = round(snapshot.asks[0][0], 2)
+            if len(snapshot.asks):
+                best_ask = round(float(snapshot.asks[0, 0]), 2)
                 price_touches[best_ask] = price_touches.get(best_ask, 0) + 1
         
         # Calculate stickiness scores
@@ -322,14 +383,16 @@ class MarketMicrostructure:
     
     def _calculate_trade_flow_signals(self):
         """Analyze trade flow patterns"""
-        if len(self.trade_history) < 10:
+        if self.trade_count < 10:
             return
         
-        recent_trades = list(self.trade_history)[-self.config.MOMENTUM_WINDOW:]
+        window = self.config.MOMENTUM_WINDOW
+        sizes = self._trade_sizes[-window:]
+        sides = self._trade_sides[-window:]
+        prices = self._trade_prices[-window:]
         
         # Net aggressive buying
-        buy_volume = sum(t.size for t in recent_trades if t.is_aggressive_buy)
-        sell_volume = sum(t.size for t in recent_trades if t.is_aggressive_sell)
+        buy_volume, sell_volume, _, _ = side_volumes(sizes, sides)
         total_volume = buy_volume + sell_volume
         
         if total_volume > 0:
@@ -340,9 +403,9 @@ class MarketMicrostructure:
         self._calculate_vwap_deviation()
         
         # Price momentum
-        if len(recent_trades) >= 5:
-            first_price = recent_trades[0].price
-            last_price = recent_trades[-1].price
+        if len(prices) >= 5:
+            first_price = float(prices[0])
+            last_price = float(prices[-1])
             momentum = (last_price - first_price) / first_price
             self.current_signals.momentum_score = max(-1.0, min(1.0, momentum * 1000))  # Scale for readability
             print(f"      Price momentum: {self.current_signals.momentum_score:.3f}")
@@ -355,52 +418,55 @@ class MarketMicrostructure:
     
     def _calculate_vwap_deviation(self):
         """Calculate current price deviation from VWAP"""
-        if len(self.trade_history) < self.config.VWAP_WINDOW:
+        window = self.config.VWAP_WINDOW
+        if self.trade_count < window:
             return
         
-        recent_trades = list(self.trade_history)[-self.config.VWAP_WINDOW:]
+        prices = self._trade_prices[-window:]
+        sizes = self._trade_sizes[-window:]
         
-        total_value = sum(t.price * t.size for t in recent_trades)
-        total_volume = sum(t.size for t in recent_trades)
+        total_value = float(np.dot(prices, sizes))
+        total_volume = float(sizes.sum())
         
         if total_volume > 0:
             vwap = total_value / total_volume
-            current_price = recent_trades[-1].price
+            current_price = float(prices[-1])
             deviation = (current_price - vwap) / vwap
             self.current_signals.vwap_deviation = deviation
             print(f"      VWAP deviation: {deviation:.4f} (current: ${current_price:.5f}, VWAP: ${vwap:.5f})")
     
     def _calculate_trade_velocity(self):
         """Calculate recent trade frequency"""
-        if len(self.trade_history) < self.config.TRADE_VELOCITY_WINDOW:
+        window = self.config.TRADE_VELOCITY_WINDOW
+        if self.trade_count < window:
             return
         
-        recent_trades = list(self.trade_history)[-self.config.TRADE_VELOCITY_WINDOW:]
+        timestamps = self._trade_ts[-window:]
         
-        if len(recent_trades) >= 2:
-            time_span = recent_trades[-1].timestamp - recent_trades[0].timestamp
+        if len(timestamps) >= 2:
+            time_span = float(timestamps[-1] - timestamps[0])
             if time_span > 0:
-                trades_per_second = len(recent_trades) / time_span
+                trades_per_second = len(timestamps) / time_span
                 self.current_signals.trade_velocity = trades_per_second
                 print(f"      Trade velocity: {trades_per_second:.2f} trades/sec")
     
     def _calculate_accumulation_score(self):
         """Detect accumulation vs distribution patterns"""
-        if len(self.trade_history) < self.config.ACCUMULATION_WINDOW:
+        window = self.config.ACCUMULATION_WINDOW
+        if self.trade_count < window:
             return
         
-        recent_trades = list(self.trade_history)[-self.config.ACCUMULATION_WINDOW:]
+        sizes = self._trade_sizes[-window:]
+        sides = self._trade_sides[-window:]
+        n = len(sides)
         
-        # Simple accumulation indicator: consistent buying of increasing sizes
-        buy_trades = [t for t in recent_trades if t.is_aggressive_buy]
-        sell_trades = [t for t in recent_trades if t.is_aggressive_sell]
+        buy_volume, sell_volume, buy_count, sell_count = side_volumes(sizes, sides)
         
-        buy_momentum = len(buy_trades) / len(recent_trades) if recent_trades else 0
-        sell_momentum = len(sell_trades) / len(recent_trades) if recent_trades else 0
+        # Simple accumulation indicator: consistent buying of increasing sizes
+        buy_momentum = buy_count / n if n else 0
+        sell_momentum = sell_count / n if n else 0
         
         # Weight by volume
-        buy_volume = sum(t.size for t in buy_trades)
-        sell_volume = sum(t.size for t in sell_trades)
         total_volume = buy_volume + sell_volume
         
         if total_volume > 0:
@@ -449,25 +515,13 @@ class MarketMicrostructure:
     
     def _update_trade_statistics(self):
         """Update running statistics on trade sizes"""
-        if len(self.trade_history) < 10:
-            return
-        
-        sizes = [t.size for t in self.trade_history if t and hasattr(t, 'size')]
-        
-        if not sizes:  # No valid sizes
+        sizes = self._trade_sizes.view()  # sizes of the trades in the history
+        if len(sizes) < 10:
             return
         
-        self.trade_size_stats['mean'] = np.mean(sizes)
-        self.trade_size_stats['std'] = np.std(sizes)
-        
-        # Calculate percentiles - FIX: Check if TRADE_SIZE_PERCENTILES exists
-        percentiles = {}
-        if hasattr(self.config, 'TRADE_SIZE_PERCENTILES') and self.config.TRADE_SIZE_PERCENTILES:
-            for p in self.config.TRADE_SIZE_PERCENTILES:
-                percentiles[p] = np.percentile(sizes, p)
-        else:
-            # Fallback percentiles
-            for p in [25, 50, 75, 90, 95]:
-                percentiles[p] = np.percentile(sizes, p)
+        self.trade_size_stats['mean'] = sizes.mean()
+        self.trade_size_stats['std'] = sizes.std()
         
-        self.trade_size_stats['percentiles'] = percentiles
\ No newline at end of file
+        # Calculate percentiles in one pass - FIX: Check if TRADE_SIZE_PERCENTILES exists
+        levels = getattr(self.config, 'TRADE_SIZE_PERCENTILES', None) or [25, 50, 75, 90, 95]  # Fallback percentiles
+        self.trade_size_stats['percentiles'] = dict(zip(levels, np.percentile(sizes, levels)))
\ No newline at end of file
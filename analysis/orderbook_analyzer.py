@@ -72,45 +72,59 @@ class OrderbookAnalyzer:
         
         print(f"📊 Orderbook Analyzer initialized")
     
-    def update_baselines_from_learning(self, learning_stats: Dict):
-        """Update baselines from learning phase data - FIXED VERSION"""
+    @staticmethod
+    def compute_baselines(learning_stats: Dict) -> Dict:
+        """Baseline statistics from learning phase samples
+        
+        Pure function of the sample columns, so it can run off the event loop.
+        """
+        baselines = {}
+        
+        spreads = learning_stats.get('spreads')
+        if spreads is not None and len(spreads):
+            spreads = np.asarray(spreads, dtype=np.float64)
+            levels = (25, 50, 75, 90, 95)
+            values = np.percentile(spreads, levels)
+            baselines['spread'] = {
+                'mean': float(np.mean(spreads)),
+                'std': float(np.std(spreads)),
+                'percentiles': {str(level): float(value) for level, value in zip(levels, values)}
+            }
+        
+        imbalances = learning_stats.get('imbalances')
+        if imbalances is not None and len(imbalances):
+            # Imbalances are a numeric column (depth/timestamp kept in parallel columns)
+            baselines['imbalance_std'] = float(np.std(np.asarray(imbalances, dtype=np.float64)))
+        
+        prices = learning_stats.get('mid_prices')
+        if prices is not None and len(prices) > 1:
+            prices = np.asarray(prices, dtype=np.float64)
+            price_changes = np.diff(prices) / prices[:-1]
+            baselines['volatility'] = float(np.std(price_changes))
+        
+        return baselines
+    
+    def update_baselines_from_learning(self, learning_stats: Dict, baselines: Optional[Dict] = None):
+        """Update baselines from learning phase data - FIXED VERSION
+        
+        baselines may be passed in precomputed by compute_baselines.
+        """
         print("📚 Updating analysis baselines from learning phase...")
         
         try:
-            if learning_stats.get('spreads'):
-                spreads = np.array(learning_stats['spreads'])
-                self.baseline_spread = {
-                    'mean': float(np.mean(spreads)),
-                    'std': float(np.std(spreads)),
-                    'percentiles': {
-                        '25': float(np.percentile(spreads, 25)),
-                        '50': float(np.percentile(spreads, 50)),
-                        '75': float(np.percentile(spreads, 75)),
-                        '90': float(np.percentile(spreads, 90)),
-                        '95': float(np.percentile(spreads, 95))
-                    }
-                }
+            if baselines is None:
+                baselines = self.compute_baselines(learning_stats)
+            
+            if 'spread' in baselines:
+                self.baseline_spread = baselines['spread']
                 print(f"   📈 Baseline spread: {self.baseline_spread['mean']:.4f}% ± {self.baseline_spread['std']:.4f}%")
             
-            if learning_stats.get('imbalances'):
-                # Handle imbalances which might be a list of dicts
-                imbalances_list = learning_stats['imbalances']
-                if imbalances_list and len(imbalances_list) > 0:
-                    # Extract just the imbalance values
-                    if isinstance(imbalances_list[0], dict):
-                        imbalance_values = [item['imbalance'] for item in imbalances_list if 'imbalance' in item]
-                    else:
-                        imbalance_values = imbalances_list
-                    
-                    if imbalance_values:
-                        imbalances = np.array(imbalance_values)
-                        self.baseline_imbalance_std = float(np.std(imbalances))
-                        print(f"   ⚖️  Baseline imbalance volatility: {self.baseline_imbalance_std:.4f}")
+            if 'imbalance_std' in baselines:
+                self.baseline_imbalance_std = baselines['imbalance_std']
+                print(f"   ⚖️  Baseline imbalance volatility: {self.baseline_imbalance_std:.4f}")
             
-            if learning_stats.get('mid_prices') and len(learning_stats['mid_prices']) > 1:
-                prices = np.array(learning_stats['mid_prices'])
-                price_changes = np.diff(prices) / prices[:-1]
-                self.baseline_volatility = float(np.std(price_changes))
+            if 'volatility' in baselines:
+                self.baseline_volatility = baselines['volatility']
                 print(f"   📊 Baseline price volatility: {self.baseline_volatility:.6f}")
                 
         except Exception as e:
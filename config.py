@@ -33,6 +33,7 @@ class TradingConfig:
 
     # Risk management
     MAX_ORDERS_PER_SIDE: int = 1
+    MAX_OPEN_ORDERS: int = 1000  # Exchange open-order limit per account; caps order tracking
     REBALANCE_THRESHOLD: float = 0.01  # 1%
     MIN_ORDER_SIZE: float = 0.00000001  # Minimum order size
     MIN_ACCOUNT_VALUE: float = 1.0  # Minimum account value to trade
@@ -55,12 +56,20 @@ class TradingConfig:
     COLLECT_SPREAD_STATISTICS: bool = True
     COLLECT_VOLUME_STATISTICS: bool = True
     COLLECT_PRICE_MOVEMENT_STATS: bool = True
+    MAX_LEARNING_SAMPLES: int = 200000   # Per-buffer cap (oldest samples dropped beyond this)
     
     # =================== FASTER ORDER MANAGEMENT ===================
     
     # Timing - Make these much faster
     UPDATE_INTERVAL: float = 0.01  # Reduced from 5.0 to 0.01 seconds
     ORDER_REFRESH_INTERVAL: float = 0.5  # New: How often to check/refresh orders
+    MAX_BACKOFF_INTERVAL: float = 30.0  # Cap on the retry sleep when data is missing or the loop errors
+    MAX_CONSECUTIVE_ERRORS: int = 5  # Stop the bot after more loop errors than this in a row
+    WS_ORDERBOOK_TIMEOUT: float = 1.0  # Wait this long for a WebSocket orderbook before polling REST
+    ACCOUNT_SYNC_INTERVAL: float = 0.25  # Min seconds between REST position/order syncs in WebSocket mode
+    HTTP_POOL_SIZE: int = 16  # Keep-alive connections kept open to the REST API
+    LATENCY_REPORT_INTERVAL: float = 10.0  # Seconds between loop latency summaries sent to InfluxDB
+    LOOP_OVERRUN_WARN_TICKS: int = 20  # Warn once the loop misses this many deadlines in a row
     QUICK_CANCEL_THRESHOLD: float = 0.02  # 2% - Cancel orders faster when price moves
     
     # Order Management Strategy
@@ -80,6 +89,7 @@ class TradingConfig:
     # Safety
     ENABLE_TRADING: bool = True  # Set to True when ready
     LOG_LEVEL: str = "INFO"
+    VERBOSE: bool = False  # Print per-order progress to the console (errors are always printed)
     
     # Order types
     ORDER_TYPE: str = "limit"  # limit, market, etc.
@@ -91,6 +101,7 @@ class TradingConfig:
     ORDERBOOK_HISTORY_SIZE: int = 300  # Number of orderbook snapshots to keep
     TRADE_HISTORY_SIZE: int = 500     # Number of recent trades to analyze
     MICROSTRUCTURE_UPDATE_INTERVAL: float = 1.0  # How often to update analysis
+    MICROSTRUCTURE_MIN_INTERVAL_MS: float = 50.0  # Minimum gap between orderbook snapshots fed to the analyzer
     
     # Order Flow Imbalance Detection
     IMBALANCE_DEPTH_LEVELS: int = 15   # How many price levels to analyze for imbalance
@@ -1,7 +1,9 @@
 import asyncio
 import logging
+import numpy as np
 from typing import Dict, Optional, List
 from hyperliquid.info import Info
+from requests.adapters import HTTPAdapter
 from hyperliquid.utils import constants
 from config import TradingConfig
 import time
@@ -23,6 +25,8 @@ class DataManager:
         print(f"🔌 Initializing DataManager on {'testnet' if self.config.TESTNET else 'mainnet'}")
         self.logger.info(f"Initializing DataManager on {'testnet' if self.config.TESTNET else 'mainnet'}")
         
+        self._configure_session()
+        
         # Test connection
         try:
             print("🔍 Testing connection to Hyperliquid...")
@@ -129,8 +133,25 @@ class DataManager:
         }
 
 
+    @property
+    def session(self):
+        """Keep-alive REST session, shared with the trading client"""
+        return self.info.session
+
+    def _configure_session(self):
+        """Size the keep-alive connection pool of the REST session
+        
+        The SDK sends every REST call through one long-lived requests.Session,
+        so concurrent to_thread fetches reuse open TLS connections instead of
+        handshaking again.
+        """
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.HTTP_POOL_SIZE)
+        self.info.session.mount('https://', adapter)
+        self.info.session.mount('http://', adapter)
+
     async def cleanup(self):
         """Cleanup resources"""
+        self.info.session.close()
         print("🧹 DataManager cleanup complete")
         self.logger.info("DataManager cleanup complete")
     
@@ -141,7 +162,7 @@ class DataManager:
         
         try:
             # Get L2 orderbook
-            book = self.info.l2_snapshot(coin)
+            book = await asyncio.to_thread(self.info.l2_snapshot, coin)
             
             if not book or 'levels' not in book:
                 print(f"⚠️  No orderbook data received for {coin}")
@@ -197,6 +218,9 @@ class DataManager:
             result = {
                 'bids': bids,
                 'asks': asks,
+                # Level sizes as arrays (same order as bids/asks) for vectorised consumers
+                'bid_vol': np.array([bid[1] for bid in bids]),
+                'ask_vol': np.array([ask[1] for ask in asks]),
                 'timestamp': raw_data.get('time', 0),
                 'symbol': self.config.SYMBOL,
                 'best_bid': best_bid,
@@ -226,7 +250,7 @@ class DataManager:
             print(f"   🕯️ Trying candles method for trade proxy...")
             try:
                 # Get 1-minute candles for the last few minutes
-                candles = self.info.candles_snapshot(coin, "1m", 5)  # Last 5 minutes
+                candles = await asyncio.to_thread(self.info.candles_snapshot, coin, "1m", 5)  # Last 5 minutes
                 
                 if candles and len(candles) > 0:
                     # Convert candles to trade-like events
@@ -341,7 +365,7 @@ class DataManager:
         
         try:
             # Get clearing house state
-            account_state = self.info.user_state(user_address)
+            account_state = await asyncio.to_thread(self.info.user_state, user_address)
             
             if account_state:
                 print("✅ Account info retrieved successfully")
@@ -382,7 +406,7 @@ class DataManager:
         print(f"📋 Fetching open orders for {user_address[:10]}...")
         
         try:
-            orders = self.info.open_orders(user_address)
+            orders = await asyncio.to_thread(self.info.open_orders, user_address)
             order_list = orders or []
             
             print(f"✅ Found {len(order_list)} open orders")
@@ -422,7 +446,7 @@ class DataManager:
         print(f"🎯 Fetching recent fills for {user_address[:10]}...")
         
         try:
-            fills = self.info.user_fills(user_address)
+            fills = await asyncio.to_thread(self.info.user_fills, user_address)
             fill_list = fills or []
             
             print(f"✅ Found {len(fill_list)} recent fills")
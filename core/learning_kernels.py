@@ -0,0 +1,57 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional - kernels run as plain Python/NumPy
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Book depths used for the multi-level imbalance (kept in sync with snapshot_stats)
+IMBALANCE_DEPTHS = np.array([3, 5, 10], dtype=np.int8)
+
+# Layout of the snapshot_stats output array
+SNAPSHOT_OUT_SIZE = 4
+CONCENTRATION = 3
+
+@njit(cache=True)
+def snapshot_stats(bid_vol, ask_vol, out):
+    """Per-snapshot learning statistics over the top 20 book levels
+
+    Writes into the caller-owned out array (SNAPSHOT_OUT_SIZE floats) so no
+    arrays are allocated per snapshot:
+    - out[0:3]: (bid - ask) / (bid + ask) volume over the top
+      IMBALANCE_DEPTHS[i] levels, NaN where there is no volume
+    - out[CONCENTRATION]: top-3 share of top-20 volume averaged over both
+      sides, NaN if either side is empty
+    """
+    n_bids = min(len(bid_vol), 20)
+    n_asks = min(len(ask_vol), 20)
+
+    bid_cum = 0.0
+    ask_cum = 0.0
+    top3_bid = 0.0
+    top3_ask = 0.0
+    k = 0
+    for i in range(20):
+        if i < n_bids:
+            bid_cum += bid_vol[i]
+        if i < n_asks:
+            ask_cum += ask_vol[i]
+        if i == 2:
+            top3_bid = bid_cum
+            top3_ask = ask_cum
+        if k < 3 and i == IMBALANCE_DEPTHS[k] - 1:
+            total = bid_cum + ask_cum
+            out[k] = (bid_cum - ask_cum) / total if total > 0 else np.nan
+            k += 1
+
+    out[CONCENTRATION] = np.nan
+    if bid_cum > 0 and ask_cum > 0:
+        out[CONCENTRATION] = (top3_bid / bid_cum + top3_ask / ask_cum) / 2
+
+def warm_up():
+    """Compile the kernels ahead of the first live snapshot"""
+    levels = np.ones(20)
+    snapshot_stats(levels, levels, np.empty(SNAPSHOT_OUT_SIZE))
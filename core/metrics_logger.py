@@ -161,6 +161,28 @@ class InfluxMetricsLogger:
         except Exception as e:
             self.logger.error(f"Failed to log pricing metrics: {e}")
 
+    def log_latency_metrics(self, latency: Dict):
+        """Log trading loop latency percentiles (microseconds)"""
+        if not self.enabled or not latency:
+            return
+
+        try:
+            point = Point("latency_metrics") \
+                .tag("symbol", self.config.SYMBOL) \
+                .field("iterations", int(latency.get('iterations', 0))) \
+                .field("fetch_p50_us", float(latency.get('fetch_p50_us', 0))) \
+                .field("fetch_p99_us", float(latency.get('fetch_p99_us', 0))) \
+                .field("fetch_max_us", float(latency.get('fetch_max_us', 0))) \
+                .field("tick_p50_us", float(latency.get('tick_p50_us', 0))) \
+                .field("tick_p99_us", float(latency.get('tick_p99_us', 0))) \
+                .field("tick_max_us", float(latency.get('tick_max_us', 0))) \
+                .time(datetime.utcnow(), WritePrecision.NS)
+
+            self.write_api.write(bucket=self.bucket, org=self.org, record=point)
+
+        except Exception as e:
+            self.logger.error(f"Failed to log latency metrics: {e}")
+
     def cleanup(self):
         """Close InfluxDB connection"""
         if self.client:
@@ -1,4 +1,6 @@
 from typing import Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
 import logging
 from datetime import datetime
 from config import TradingConfig
@@ -26,21 +28,44 @@ class Position:
 import time
 from datetime import datetime
 
+@dataclass(eq=False)
 class Order:
-    def __init__(self, order_data: Dict):
-        self.order_id = order_data.get('oid', '')
-        self.symbol = order_data.get('coin', '')
-        self.side = 'buy' if order_data.get('side') == 'B' else 'sell'
-        self.size = float(order_data.get('sz', 0))
-        self.price = float(order_data.get('limitPx', 0))
-        self.timestamp = order_data.get('timestamp', 0)
+    """Tracked open order, stored as a slotted record (no per-instance dict)"""
+    __slots__ = ('order_id', 'symbol', 'side', 'size', 'price', 'timestamp', 'reduce_only', 'status', 'created_at')
+    
+    order_id: str
+    symbol: str
+    side: str  # 'buy' or 'sell'
+    size: float
+    price: float
+    timestamp: int
+    reduce_only: bool
+    
+    def __post_init__(self):
         self.status = 'open'
         
         # Store creation time as float timestamp for easy comparison
         self.created_at = time.time()  # Always store as float
+    
+    @classmethod
+    def from_exchange(cls, order_data: Dict) -> 'Order':
+        """Build from an exchange open-order dict
         
-        # Keep datetime for compatibility if needed
-        self.created_datetime = datetime.now()
+        created_at is taken from the exchange's placement time (ms) when
+        present, so orders first seen on a sync still age correctly.
+        """
+        order = cls(
+            order_id=order_data.get('oid', ''),
+            symbol=order_data.get('coin', ''),
+            side='buy' if order_data.get('side') == 'B' else 'sell',
+            size=float(order_data.get('sz', 0)),
+            price=float(order_data.get('limitPx', 0)),
+            timestamp=order_data.get('timestamp', 0),
+            reduce_only=order_data.get('reduceOnly', False)
+        )
+        if order.timestamp:
+            order.created_at = order.timestamp / 1000.0
+        return order
     
     def get_age_seconds(self) -> float:
         """Get order age in seconds"""
@@ -54,7 +79,8 @@ class PositionTracker:
     def __init__(self, config: TradingConfig):
         self.config = config
         self.positions: Dict[str, Position] = {}
-        self.open_orders: Dict[str, Order] = {}
+        self.open_orders: Dict[str, Order] = OrderedDict()  # oldest first
+        self.max_tracked_orders = config.MAX_OPEN_ORDERS
         self.account_value: float = 0.0  # Track total account value
         self.logger = logging.getLogger(__name__)
 
@@ -77,11 +103,10 @@ class PositionTracker:
             return [order for order in self.open_orders.values() if order.symbol == symbol]
         return list(self.open_orders.values())
     
-    def remove_orders_fast(self, order_ids: List[str]):
-        """Fast order removal from tracking"""
-        for order_id in order_ids:
-            if order_id in self.open_orders:
-                del self.open_orders[order_id]
+    def remove_orders_fast(self, order_ids: List[str]) -> List[Order]:
+        """Bulk order removal from tracking, returning the removed orders"""
+        open_orders = self.open_orders
+        return [open_orders.pop(order_id) for order_id in set(order_ids).intersection(open_orders)]
 
     def update_from_account_state(self, account_state: Dict):
         """Update positions from Hyperliquid account state"""
@@ -178,17 +203,49 @@ class PositionTracker:
     def update_from_open_orders(self, open_orders: List[Dict]):
         """Update order tracking from open orders"""
         try:
-            # Clear existing orders and rebuild from current state
-            self.open_orders.clear()
+            # Drop orders the exchange no longer reports (filled/cancelled),
+            # keeping the tracked ones so their ages survive the sync
+            live = {order_data.get('oid', '') for order_data in open_orders}
+            for order_id in list(self.open_orders):
+                if order_id not in live:
+                    del self.open_orders[order_id]
             
             for order_data in open_orders:
-                order = Order(order_data)
-                self.open_orders[order.order_id] = order
-                self.logger.debug(f"Tracking order {order.order_id}: {order.side} {order.size} @ {order.price}")
+                order_id = order_data.get('oid', '')
+                order = self.open_orders.get(order_id)
+                if order is None:
+                    order = Order.from_exchange(order_data)
+                    self.open_orders[order_id] = order
+                    self.logger.debug(f"Tracking order {order.order_id}: {order.side} {order.size} @ {order.price}")
+                else:
+                    # Remaining size shrinks on partial fills
+                    order.size = float(order_data.get('sz', order.size))
+                    order.price = float(order_data.get('limitPx', order.price))
+            
+            self._evict_oldest_orders()
                 
         except Exception as e:
             self.logger.error(f"Error updating orders: {e}")
     
+    def track_orders(self, orders: Dict[str, Order]):
+        """Track newly placed orders, evicting the oldest beyond the cap"""
+        for order_id, order in orders.items():
+            self.open_orders[order_id] = order
+            self.open_orders.move_to_end(order_id)
+        self._evict_oldest_orders()
+    
+    def _evict_oldest_orders(self):
+        """Keep at most max_tracked_orders, dropping the oldest first
+        
+        Cancelled and filled orders are already removed by the cancel path and
+        the exchange sync, so everything here is live. The cap is the
+        exchange's open-order limit; evicting means tracking has lost sync and
+        the order stays invisible to cancels until the next poll.
+        """
+        while len(self.open_orders) > self.max_tracked_orders:
+            order_id, _ = self.open_orders.popitem(last=False)
+            self.logger.warning(f"Evicted live order {order_id} from tracking - over {self.max_tracked_orders} open orders")
+    
     def get_position(self, symbol: str) -> Optional[Position]:
         """Get current position for a symbol"""
         return self.positions.get(symbol)
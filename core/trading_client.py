@@ -1,11 +1,38 @@
 import asyncio
 import logging
+import threading
+import time
 from typing import Dict, List, Optional
 from hyperliquid.exchange import Exchange
+import hyperliquid.exchange as sdk_exchange
 from hyperliquid.utils import constants
+from hyperliquid.utils.types import Cloid
 from eth_account import Account
 from config import TradingConfig
 
+# Maximum orders per signed bulk order action
+BULK_ORDER_LIMIT = 50
+
+_nonce_lock = threading.Lock()
+_last_nonce = 0
+
+def _next_nonce() -> int:
+    """Millisecond timestamp nonce for signed actions, never reused
+
+    The SDK nonces each action with the current millisecond and the exchange
+    rejects a nonce it has already seen. Cancels and placements are signed
+    concurrently in worker threads, so a clash is bumped to the next
+    millisecond. One process-wide counter, as the exchange tracks nonces per
+    signer and not per client object.
+    """
+    global _last_nonce
+    with _nonce_lock:
+        _last_nonce = max(time.time_ns() // 1_000_000, _last_nonce + 1)
+        return _last_nonce
+
+# Installed once for every Exchange in the process
+sdk_exchange.get_timestamp_ms = _next_nonce
+
 class TradingClient:
     def __init__(self, config: TradingConfig):
         self.config = config
@@ -45,19 +72,34 @@ class TradingClient:
             self.user_address = None
             self.logger.warning("No private key provided - trading disabled")
     
+    def use_session(self, session):
+        """Send exchange requests through a shared keep-alive REST session"""
+        if self.exchange:
+            self.exchange.session = session
+    
     # In your trading_client.py, UPDATE the place_orders method:
 
     async def place_orders(self, orders: List[Dict]) -> List[Optional[str]]:
-        """Place multiple orders with detailed logging - FIXED for market orders"""
-        print(f"\n📦 PLACING {len(orders)} ORDERS")
-        print("-" * 30)
+        """Place multiple orders with detailed logging - FIXED for market orders
+        
+        Per-order progress output (submissions, responses, fills) is only
+        printed with config.VERBOSE; failures are always printed.
+        """
+        verbose = self.config.VERBOSE
+        if verbose:
+            print(f"\n📦 PLACING {len(orders)} ORDERS")
+            print("-" * 30)
         
         if not self.exchange or not self.config.ENABLE_TRADING:
-            print("📝 Paper trading mode - simulating order placement")
+            if verbose:
+                print("📝 Paper trading mode - simulating order placement")
             paper_order_ids = []
+            now = asyncio.get_running_loop().time()
             for i, order in enumerate(orders):
-                paper_id = f"paper_order_{i}_{asyncio.get_event_loop().time()}"
+                paper_id = f"paper_order_{i}_{now}"
                 paper_order_ids.append(paper_id)
+                if not verbose:
+                    continue
                 side_text = "BUY" if order['is_buy'] else "SELL"
                 
                 # Handle both market and limit orders for display
@@ -77,102 +119,96 @@ class TradingClient:
             self.logger.info(f"Paper trading: Would place {len(orders)} orders")
             return paper_order_ids
         
-        print(f"🚨 LIVE TRADING - Placing {len(orders)} real orders")
-        order_ids = []
+        if verbose:
+            print(f"🚨 LIVE TRADING - Placing {len(orders)} real orders")
+        order_ids = [None] * len(orders)
         
         try:
-            # Place orders individually using the correct SDK format
-            for i, order in enumerate(orders):
-                print(f"\n   📋 Order {i+1}/{len(orders)}:")
-                side_text = "BUY" if order['is_buy'] else "SELL"
-                
-                # Handle display for different order types
-                if 'limit_px' in order:
-                    price_display = f"@ ${order['limit_px']:.5f}"
-                    order_price = order['limit_px']
-                else:
-                    price_display = "@ MARKET"
-                    order_price = None  # Will be handled by exchange
-                
-                order_type = order.get('order_type', {})
-                if 'market' in order_type:
-                    type_display = "MARKET"
-                else:
-                    type_display = "LIMIT"
-                
-                reduce_only = order.get('reduce_only', False)
-                reduce_text = " (REDUCE-ONLY)" if reduce_only else ""
-                
-                print(f"      {side_text} {order['sz']:.2f} {order['coin']} {price_display} ({type_display}){reduce_text}")
+            # Limit orders go out as signed batches; market orders have no
+            # limit price to batch with and are still sent one at a time
+            limit_idx = [i for i, order in enumerate(orders) if 'market' not in order.get('order_type', {})]
+            market_idx = [i for i, order in enumerate(orders) if 'market' in order.get('order_type', {})]
+            
+            for start in range(0, len(limit_idx), BULK_ORDER_LIMIT):
+                batch = limit_idx[start:start + BULK_ORDER_LIMIT]
+                # All legs of a batch share one signed action, so the exchange
+                # processes them together
+                requests = []
+                for i in batch:
+                    order = orders[i]
+                    if verbose:
+                        self._print_order(i, len(orders), order)
+                    requests.append({
+                        'coin': self.config.SYMBOL,
+                        'is_buy': order['is_buy'],
+                        'sz': order['sz'],
+                        'limit_px': order['limit_px'],
+                        'order_type': order['order_type'],
+                        'reduce_only': order.get('reduce_only', False)
+                    })
                 
                 try:
-                    print(f"      🔄 Submitting to exchange...")
+                    if verbose:
+                        print(f"      🔄 Submitting batch of {len(requests)} orders to exchange...")
+                    response = await asyncio.to_thread(self.exchange.bulk_orders, requests)
+                    if verbose:
+                        print(f"      📡 Response received: {response}")
                     
-                    # Handle market vs limit orders differently
-                    if 'market' in order_type:
-                        # For market orders, don't pass limit_px
-                        response = self.exchange.order(
-                            self.config.SYMBOL,           # asset symbol
-                            order['is_buy'],              # True for buy, False for sell
-                            order['sz'],                  # size as float
-                            None,                         # No price for market orders
-                            order['order_type'],          # order type dict
-                            reduce_only=order.get('reduce_only', False)
-                        )
+                    if response and response.get('status') == 'ok':
+                        statuses = response.get('response', {}).get('data', {}).get('statuses', [])
+                        for i, status in zip(batch, statuses):
+                            order_ids[i] = self._order_id_from_status(i, status)
+                        if len(statuses) < len(batch):
+                            print(f"      ❌ Missing statuses for {len(batch) - len(statuses)} orders")
+                            self.logger.warning(f"Batch response missing {len(batch) - len(statuses)} statuses")
                     else:
-                        # For limit orders, pass the limit price
-                        response = self.exchange.order(
-                            self.config.SYMBOL,           # asset symbol
-                            order['is_buy'],              # True for buy, False for sell
-                            order['sz'],                  # size as float
-                            order_price,                  # price as float
-                            order['order_type'],          # order type dict
-                            reduce_only=order.get('reduce_only', False)
-                        )
-                    
-                    print(f"      📡 Response received: {response}")
+                        print(f"      ❌ Batch failed: {response}")
+                        self.logger.error(f"Order batch failed: {response}")
+                        
+                except Exception as e:
+                    print(f"      ❌ Exception placing order batch: {e}")
+                    self.logger.error(f"Error placing order batch: {e}")
+            
+            for i in market_idx:
+                order = orders[i]
+                if verbose:
+                    self._print_order(i, len(orders), order)
+                try:
+                    if verbose:
+                        print(f"      🔄 Submitting to exchange...")
+                    # For market orders, don't pass limit_px
+                    response = await asyncio.to_thread(
+                        self.exchange.order,
+                        self.config.SYMBOL,           # asset symbol
+                        order['is_buy'],              # True for buy, False for sell
+                        order['sz'],                  # size as float
+                        None,                         # No price for market orders
+                        order['order_type'],          # order type dict
+                        reduce_only=order.get('reduce_only', False)
+                    )
+                    if verbose:
+                        print(f"      📡 Response received: {response}")
                     
                     if response and response.get('status') == 'ok':
-                        # Extract order ID from response
                         statuses = response.get('response', {}).get('data', {}).get('statuses', [])
-                        if statuses and len(statuses) > 0:
-                            status = statuses[0]
-                            if 'resting' in status:
-                                order_id = status['resting']['oid']
-                                order_ids.append(order_id)
-                                print(f"      ✅ Order placed successfully!")
-                                print(f"         Order ID: {order_id}")
-                                self.logger.info(f"Order {i+1} placed successfully: {order_id}")
-                            elif 'filled' in status:
-                                # Market order was filled immediately
-                                fill_data = status['filled']
-                                order_ids.append(f"filled_{i}")  # Synthetic ID for filled orders
-                                print(f"      ✅ Market order filled immediately!")
-                                print(f"         Fill price: ${fill_data.get('avgPx', 'N/A')}")
-                                print(f"         Fill size: {fill_data.get('totalSz', 'N/A')}")
-                                self.logger.info(f"Market order {i+1} filled immediately")
-                            else:
-                                order_ids.append(None)
-                                print(f"      ⚠️  Order status unclear: {status}")
-                                self.logger.warning(f"Order {i+1} status unclear: {status}")
+                        if statuses:
+                            order_ids[i] = self._order_id_from_status(i, statuses[0])
                         else:
-                            order_ids.append(None)
                             print(f"      ❌ No status in response")
                             self.logger.warning(f"Order {i+1} - no status in response")
                     else:
-                        order_ids.append(None)
                         print(f"      ❌ Order failed: {response}")
                         self.logger.error(f"Order {i+1} failed: {response}")
                         
                 except Exception as e:
                     print(f"      ❌ Exception placing order: {e}")
                     self.logger.error(f"Error placing order {i+1}: {e}")
-                    order_ids.append(None)
             
             successful_orders = len([oid for oid in order_ids if oid])
-            print(f"\n📊 ORDER PLACEMENT SUMMARY:")
-            print(f"   ✅ Successful: {successful_orders}/{len(orders)}")
-            print(f"   ❌ Failed: {len(orders) - successful_orders}/{len(orders)}")
+            if verbose:
+                print(f"\n📊 ORDER PLACEMENT SUMMARY:")
+                print(f"   ✅ Successful: {successful_orders}/{len(orders)}")
+                print(f"   ❌ Failed: {len(orders) - successful_orders}/{len(orders)}")
             
             self.logger.info(f"Placed {successful_orders}/{len(orders)} orders successfully")
             return order_ids
@@ -182,15 +218,57 @@ class TradingClient:
             self.logger.error(f"Error in order placement: {e}")
             return [None] * len(orders)
     
+    def _print_order(self, i: int, total: int, order: Dict):
+        """Print a one-line description of an order being submitted"""
+        print(f"\n   📋 Order {i+1}/{total}:")
+        side_text = "BUY" if order['is_buy'] else "SELL"
+        price_display = f"@ ${order['limit_px']:.5f}" if 'limit_px' in order else "@ MARKET"
+        type_display = "MARKET" if 'market' in order.get('order_type', {}) else "LIMIT"
+        reduce_text = " (REDUCE-ONLY)" if order.get('reduce_only', False) else ""
+        print(f"      {side_text} {order['sz']:.2f} {order['coin']} {price_display} ({type_display}){reduce_text}")
+    
+    def _order_id_from_status(self, i: int, status: Dict) -> Optional[str]:
+        """Extract the order ID from one exchange order status"""
+        if 'resting' in status:
+            order_id = status['resting']['oid']
+            if self.config.VERBOSE:
+                print(f"      ✅ Order {i+1} placed successfully!")
+                print(f"         Order ID: {order_id}")
+            self.logger.info(f"Order {i+1} placed successfully: {order_id}")
+            return order_id
+        elif 'filled' in status:
+            # Order was filled immediately
+            if self.config.VERBOSE:
+                fill_data = status['filled']
+                print(f"      ✅ Order {i+1} filled immediately!")
+                print(f"         Fill price: ${fill_data.get('avgPx', 'N/A')}")
+                print(f"         Fill size: {fill_data.get('totalSz', 'N/A')}")
+            self.logger.info(f"Order {i+1} filled immediately")
+            return f"filled_{i}"  # Synthetic ID for filled orders
+        else:
+            if self.config.VERBOSE:
+                print(f"      ⚠️  Order {i+1} status unclear: {status}")
+            self.logger.warning(f"Order {i+1} status unclear: {status}")
+            return None
+    
     async def cancel_orders(self, order_ids: List[str]) -> bool:
-        """Cancel orders one by one using correct Hyperliquid SDK format"""
-        print(f"\n❌ CANCELLING {len(order_ids)} ORDERS")
-        print("-" * 30)
+        """Cancel orders with bulk cancel actions sent from a worker thread
+        
+        Exchange order IDs go out in one bulk_cancel action per
+        BULK_ORDER_LIMIT orders; IDs that are not numeric oids are cancelled
+        by client order ID instead. The event loop stays free while the
+        exchange responds.
+        """
+        verbose = self.config.VERBOSE
+        if verbose:
+            print(f"\n❌ CANCELLING {len(order_ids)} ORDERS")
+            print("-" * 30)
         
         if not self.exchange or not self.config.ENABLE_TRADING:
-            print("📝 Paper trading mode - simulating order cancellation")
-            for i, order_id in enumerate(order_ids):
-                print(f"   📄 Paper cancel {i+1}: {order_id}")
+            if verbose:
+                print("📝 Paper trading mode - simulating order cancellation")
+                for i, order_id in enumerate(order_ids):
+                    print(f"   📄 Paper cancel {i+1}: {order_id}")
             self.logger.info(f"Paper trading: Would cancel orders {order_ids}")
             return True
         
@@ -198,65 +276,44 @@ class TradingClient:
             print("⚠️ No orders to cancel")
             return True
         
-        print(f"🚨 LIVE TRADING - Cancelling {len(order_ids)} orders individually")
+        if verbose:
+            print(f"🚨 LIVE TRADING - Cancelling {len(order_ids)} orders")
+        
+        # Exchange order IDs are integers; anything else can only be a client order ID
+        oid_cancels = []
+        cloid_cancels = []
+        for order_id in order_ids:
+            try:
+                oid_cancels.append((order_id, {'coin': self.config.SYMBOL, 'oid': int(order_id)}))
+            except (TypeError, ValueError):
+                cloid_cancels.append(order_id)
         
         successful_cancels = 0
-        failed_cancels = 0
+        for start in range(0, len(oid_cancels), BULK_ORDER_LIMIT):
+            batch = oid_cancels[start:start + BULK_ORDER_LIMIT]
+            successful_cancels += await self._send_cancels(self.exchange.bulk_cancel, batch)
         
-        for i, order_id in enumerate(order_ids):
-            try:
-                print(f"   🔄 Cancelling order {i+1}/{len(order_ids)}: {order_id}")
-                
-                # Convert order_id to int if it's a string
+        if cloid_cancels:
+            # Fallback for IDs the exchange did not assign
+            if verbose:
+                print(f"   🔄 Trying cancel by client order ID for {len(cloid_cancels)} orders...")
+            batch = []
+            for order_id in cloid_cancels:
                 try:
-                    oid_param = int(order_id)
-                    print(f"      Using integer oid: {oid_param}")
-                except ValueError:
-                    oid_param = order_id
-                    print(f"      Using string oid: {oid_param}")
-                
-                # CORRECT FORMAT: exchange.cancel(coin, oid)
-                # The Hyperliquid SDK requires both coin name and order ID
-                response = self.exchange.cancel(self.config.SYMBOL, oid_param)
-                
-                print(f"      📡 Response: {response}")
-                
-                # Check if cancellation was successful
-                if response and response.get('status') == 'ok':
-                    successful_cancels += 1
-                    print(f"      ✅ Order {order_id} cancelled successfully")
-                    self.logger.info(f"Successfully cancelled order {order_id}")
-                else:
-                    failed_cancels += 1
-                    print(f"      ❌ Order {order_id} cancel failed: {response}")
-                    self.logger.warning(f"Failed to cancel order {order_id}: {response}")
-                    
-            except Exception as e:
-                failed_cancels += 1
-                print(f"      ❌ Exception cancelling order {order_id}: {e}")
-                self.logger.error(f"Exception cancelling order {order_id}: {e}")
-                
-                # Try alternative formats as fallback
-                try:
-                    print(f"      🔄 Trying cancel_by_cloid for {order_id}...")
-                    # Some SDKs have alternative cancel methods
-                    if hasattr(self.exchange, 'cancel_by_cloid'):
-                        alt_response = self.exchange.cancel_by_cloid(self.config.SYMBOL, order_id)
-                        if alt_response and alt_response.get('status') == 'ok':
-                            successful_cancels += 1
-                            failed_cancels -= 1  # Correct the count
-                            print(f"      ✅ Order {order_id} cancelled with alternative method")
-                        else:
-                            print(f"      ❌ Alternative method also failed for {order_id}")
-                    else:
-                        print(f"      ❌ No alternative cancel method available")
-                            
-                except Exception as alt_error:
-                    print(f"      ❌ Alternative method exception: {alt_error}")
+                    batch.append((order_id, {'coin': self.config.SYMBOL, 'cloid': Cloid.from_str(order_id)}))
+                except (TypeError, ValueError) as e:
+                    print(f"      ❌ Cannot cancel order {order_id}: {e}")
+                    self.logger.warning(f"Cannot cancel order {order_id}: {e}")
+            for start in range(0, len(batch), BULK_ORDER_LIMIT):
+                successful_cancels += await self._send_cancels(
+                    self.exchange.bulk_cancel_by_cloid, batch[start:start + BULK_ORDER_LIMIT])
+        
+        failed_cancels = len(order_ids) - successful_cancels
         
-        print(f"\n📊 CANCELLATION SUMMARY:")
-        print(f"   ✅ Successful: {successful_cancels}/{len(order_ids)}")
-        print(f"   ❌ Failed: {failed_cancels}/{len(order_ids)}")
+        if verbose:
+            print(f"\n📊 CANCELLATION SUMMARY:")
+            print(f"   ✅ Successful: {successful_cancels}/{len(order_ids)}")
+            print(f"   ❌ Failed: {failed_cancels}/{len(order_ids)}")
         
         # Consider it successful if we cancelled more than half
         success = successful_cancels > len(order_ids) // 2
@@ -267,4 +324,40 @@ class TradingClient:
         if failed_cancels > 0:
             self.logger.warning(f"Failed to cancel {failed_cancels}/{len(order_ids)} orders")
         
-        return success
\ No newline at end of file
+        return success
+    
+    async def _send_cancels(self, bulk_cancel, batch: List) -> int:
+        """Send one bulk cancel action of (order_id, request) pairs
+        
+        Returns how many orders are no longer resting. Legs the exchange
+        rejects are logged; they were typically already filled or cancelled,
+        so they count as done like a single accepted cancel did.
+        """
+        if not batch:
+            return 0
+        
+        verbose = self.config.VERBOSE
+        order_ids = [order_id for order_id, _ in batch]
+        try:
+            if verbose:
+                print(f"   🔄 Cancelling {len(batch)} orders: {order_ids}")
+            response = await asyncio.to_thread(bulk_cancel, [request for _, request in batch])
+            if verbose:
+                print(f"      📡 Response: {response}")
+        except Exception as e:
+            print(f"      ❌ Exception cancelling orders {order_ids}: {e}")
+            self.logger.error(f"Exception cancelling orders {order_ids}: {e}")
+            return 0
+        
+        if not response or response.get('status') != 'ok':
+            print(f"      ❌ Cancel of orders {order_ids} failed: {response}")
+            self.logger.warning(f"Failed to cancel orders {order_ids}: {response}")
+            return 0
+        
+        statuses = response.get('response', {}).get('data', {}).get('statuses', [])
+        for order_id, status in zip(order_ids, statuses):
+            if isinstance(status, dict) and 'error' in status:
+                self.logger.warning(f"Cancel of order {order_id} rejected: {status['error']}")
+            elif verbose:
+                print(f"      ✅ Order {order_id} cancelled successfully")
+        return len(batch)
\ No newline at end of file
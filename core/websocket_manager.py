@@ -3,11 +3,31 @@
 import asyncio
 import logging
 import json
+import types
+import numpy as np
 from typing import Dict, List, Optional, Callable
 from hyperliquid.info import Info
 from hyperliquid.utils import constants
+import hyperliquid.websocket_manager as sdk_websocket
 from config import TradingConfig
 
+# Fastest available JSON decoder for incoming WebSocket messages
+try:
+    import orjson
+    default_json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        default_json_loads = ujson.loads
+    except ImportError:
+        default_json_loads = json.loads
+
+# The SDK's WebSocket thread parses every message with its module-level json;
+# point it at the fast decoder once per process. Outgoing subscription
+# messages keep using the stdlib encoder.
+if default_json_loads is not json.loads:
+    sdk_websocket.json = types.SimpleNamespace(loads=default_json_loads, dumps=json.dumps)
+
 class WebSocketManager:
     def __init__(self, config: TradingConfig):
         self.config = config
@@ -26,6 +46,8 @@ class WebSocketManager:
         print("🔌 Initializing WebSocket connection...")
         
         try:
+            self.logger.info(f"WebSocket messages decoded with {default_json_loads.__module__}")
+            
             # Initialize Info client with WebSocket support
             base_url = constants.TESTNET_API_URL if self.config.TESTNET else constants.MAINNET_API_URL
             print(f"   🌐 Connecting to: {base_url}")
@@ -70,7 +92,10 @@ class WebSocketManager:
             raise
     
     def set_trade_callback(self, callback: Callable[[List[Dict]], None]):
-        """Set callback function for trade data"""
+        """Set callback function for trade data
+        
+        The callback receives a list of already-decoded trade dicts.
+        """
         self.trade_callback = callback
         print("🔗 Trade callback registered")
     
@@ -239,6 +264,9 @@ class WebSocketManager:
             return {
                 'bids': processed_bids,
                 'asks': processed_asks,
+                # Level sizes as arrays (same order as bids/asks) for vectorised consumers
+                'bid_vol': np.array([bid[1] for bid in processed_bids]),
+                'ask_vol': np.array([ask[1] for ask in processed_asks]),
                 'timestamp': timestamp,
                 'symbol': coin,
                 'best_bid': best_bid,
@@ -281,6 +309,10 @@ class DataManagerWithWebSocket:
         # Track if we have real-time data
         self.real_time_enabled = False
         
+        # Newest real-time orderbook only (stale snapshots are dropped)
+        self.ob_queue = asyncio.Queue(maxsize=1)
+        self._tick_size = None  # WebSocket books carry no tick size
+        
         print(f"🔌 Enhanced DataManager with corrected WebSocket initialized")
     
     async def initialize(self):
@@ -306,6 +338,19 @@ class DataManagerWithWebSocket:
         """Set callback for real-time orderbook data"""
         self.ws_manager.set_orderbook_callback(callback)
     
+    def publish_orderbook(self, orderbook: Dict):
+        """Offer a real-time orderbook to get_orderbook (event loop only)"""
+        if 'tick_size' not in orderbook:
+            if self._tick_size is None:
+                self._tick_size = self.data_manager._detect_tick_size(orderbook)
+            orderbook['tick_size'] = self._tick_size
+        
+        try:
+            self.ob_queue.get_nowait()  # drop the stale snapshot
+        except asyncio.QueueEmpty:
+            pass
+        self.ob_queue.put_nowait(orderbook)
+    
     async def start_real_time_feeds(self):
         """Start real-time data feeds"""
         if self.real_time_enabled:
@@ -316,8 +361,22 @@ class DataManagerWithWebSocket:
     def get_symbol_info(self):
         return self.data_manager.get_symbol_info()
     
+    @property
+    def session(self):
+        return self.data_manager.session
+    
     async def get_orderbook(self, symbol: str = None):
-        return await self.data_manager.get_orderbook(symbol)
+        """Newest real-time orderbook, or a REST snapshot if none arrives in time"""
+        if self.real_time_enabled and symbol in (None, self.config.SYMBOL):
+            try:
+                return await asyncio.wait_for(self.ob_queue.get(), timeout=self.config.WS_ORDERBOOK_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.logger.debug("No real-time orderbook in time - falling back to REST")
+        
+        orderbook = await self.data_manager.get_orderbook(symbol)
+        if orderbook:
+            self._tick_size = orderbook.get('tick_size', self._tick_size)
+        return orderbook
     
     async def get_recent_trades(self, symbol: str = None):
         return await self.data_manager.get_recent_trades(symbol)
@@ -1,22 +1,53 @@
 # main_enhanced.py - Complete integration of learning phase + orderbook analysis
 
 import asyncio
+import contextlib
+import importlib.util
+import io
 import logging
+import logging.handlers
+import math
+import queue
 import signal
+import sys
 import time
 import numpy as np
-from typing import Optional, Dict, List
+from operator import itemgetter
+from typing import Optional, Dict, List, Tuple
 from config import TradingConfig
 from core.data_manager import DataManager
 from core.position_tracker import PositionTracker, Order
-from strategy import EnhancedMarketMakingStrategyWithRisk
+from strategy import EnhancedMarketMakingStrategyWithRisk, FLOW_TRADE_WINDOW
 from core.trading_client import TradingClient
-from analysis.market_microstructure import MarketMicrostructure
+from analysis.market_microstructure import MarketMicrostructure, MarketSignals, trades_to_array
+from analysis.orderbook_analyzer import OrderbookAnalyzer
 from core.websocket_manager import DataManagerWithWebSocket
 from core.metrics_logger import InfluxMetricsLogger
 from utils.dynamic_config import DynamicConfig
+from utils.sample_buffer import SampleBuffer
+from utils.rolling_stats import RollingStd
+from core import learning_kernels
+from analysis import microstructure_kernels
+from core.learning_kernels import IMBALANCE_DEPTHS, SNAPSHOT_OUT_SIZE, CONCENTRATION, snapshot_stats
+
+# Level volume of a [price, size] book entry
+level_size = itemgetter(1)
 
 class EnhancedHyperliquidMarketMaker:
+    # Slots keep attribute loads in the per-tick feed handlers cheap
+    __slots__ = (
+        'config', 'data_manager', 'position_tracker', 'strategy', 'trading_client',
+        'microstructure', 'metrics_logger', 'dynamic_config',
+        '_gen_orders', '_get_risk_status', '_check_stop_loss', '_check_profit_taking',
+        'learning_phase_active', 'learning_start_time', 'trading_start_time',
+        'orderbook_snapshots_collected', 'trade_events_collected', 'learning_stats',
+        '_prev_mid', '_return_std', '_snapshot_out',
+        '_tick_counts', '_heartbeat_task', '_loop', '_feed_q', '_feed_task',
+        '_tick', '_last_learning_log', '_ws_enabled', '_main_task',
+        '_last_ob_ingest_ns', '_ob_ingest_interval_ns',
+        'running', 'logger', '_log_listener'
+    )
+    
     def __init__(self):
         print("🚀 Initializing Enhanced Hyperliquid Market Maker...")
         print("   🎓 Learning Phase + 📊 Orderbook Analysis + 🧠 Microstructure")
@@ -35,6 +66,13 @@ class EnhancedHyperliquidMarketMaker:
         self.strategy = EnhancedMarketMakingStrategyWithRisk(self.config)
         print("   🎯 Enhanced strategy with orderbook analysis initialized")
         
+        # Strategy capabilities resolved once (None where the strategy lacks them)
+        self._gen_orders = (getattr(self.strategy, 'generate_enhanced_orders_with_risk', None)
+                            or self.strategy.generate_orders)
+        self._get_risk_status = getattr(self.strategy, 'get_risk_status', None)
+        self._check_stop_loss = getattr(self.strategy, 'check_stop_loss_trigger', None)
+        self._check_profit_taking = getattr(self.strategy, 'check_profit_taking_trigger', None)
+        
         self.trading_client = TradingClient(self.config)
         print("   💱 Trading client initialized")
         
@@ -49,23 +87,54 @@ class EnhancedHyperliquidMarketMaker:
 
         # Learning phase state
         self.learning_phase_active = self.config.ENABLE_LEARNING_PHASE
-        self.learning_start_time = None
+        self.learning_start_time = None  # time.monotonic() - only used for durations
         self.trading_start_time = None
         self.orderbook_snapshots_collected = 0
         self.trade_events_collected = 0
         
-        # Enhanced learning phase statistics
+        # Per-iteration handler for the current phase, rebound when learning ends
+        self._tick = self._learning_tick if self.learning_phase_active else self._trading_tick
+        self._last_learning_log = 0
+        
+        # Microstructure ingest throttle (the loop reads the latest book separately)
+        self._last_ob_ingest_ns = 0
+        self._ob_ingest_interval_ns = int(self.config.MICROSTRUCTURE_MIN_INTERVAL_MS * 1_000_000)
+        
+        # Enhanced learning phase statistics (imbalances stored as parallel arrays,
+        # one sample per depth). Buffers keep only the newest samples.
+        max_samples = self.config.MAX_LEARNING_SAMPLES
+        max_imbalances = max_samples * len(IMBALANCE_DEPTHS)
         self.learning_stats = {
-            'spreads': [],
-            'mid_prices': [],
-            'trade_sizes': [],
-            'imbalances': [],
-            'book_stability_samples': [],
-            'liquidity_samples': [],
+            'spreads': SampleBuffer(maxlen=max_samples),
+            'mid_prices': SampleBuffer(maxlen=max_samples),
+            'trade_sizes': SampleBuffer(maxlen=max_samples),
+            'imbalances': SampleBuffer(np.float32, maxlen=max_imbalances),
+            'imbalance_depths': SampleBuffer(np.int8, maxlen=max_imbalances),
+            'imbalance_timestamps': SampleBuffer(np.float64, maxlen=max_imbalances),
+            'book_stability_samples': SampleBuffer(maxlen=max_samples),
+            'liquidity_samples': SampleBuffer(maxlen=max_samples),
             'first_snapshot_time': None,
             'last_update_time': None
         }
         
+        # Short-horizon volatility: std of the last 4 mid-price returns
+        self._prev_mid = None
+        self._return_std = RollingStd(4)
+        self._snapshot_out = np.empty(SNAPSHOT_OUT_SIZE)
+        
+        # Real-time feed counters, rolled up once per second by _heartbeat
+        # (missed_trades is cumulative)
+        self._tick_counts = {'trades': 0, 'ob': 0, 'dropped_trades': 0, 'missed_trades': 0}
+        self._heartbeat_task = None
+        
+        # WebSocket messages are queued from the SDK thread and drained in
+        # batches on the event loop by _feed_consumer
+        self._loop = None
+        self._ws_enabled = False  # set once the data manager has connected
+        self._feed_q = asyncio.Queue(maxsize=256)
+        self._feed_task = None
+        self._main_task = None  # enhanced_trading_loop task, cancelled on shutdown signals
+        
         self.running = False
         self.logger = self._setup_logging()
         print("   📝 Logging configured")
@@ -77,50 +146,127 @@ class EnhancedHyperliquidMarketMaker:
             print("   ⚡ Learning phase disabled - will start trading immediately")
         print("")
 
+    def _on_ws_trades(self, trades: List[Dict]):
+        """SDK thread callback - hand trades over to the event loop"""
+        self._loop.call_soon_threadsafe(self._put_feed, 'trades', trades)
+    
+    def _on_ws_orderbook(self, orderbook: Dict):
+        """SDK thread callback - hand the orderbook over to the event loop"""
+        self._loop.call_soon_threadsafe(self._put_feed, 'ob', orderbook)
+    
+    def _put_feed(self, kind: str, payload):
+        """Queue a feed message, dropping the oldest one if the queue is full
+        
+        Dropped orderbooks are superseded by newer ones anyway; dropped trades
+        are counted so the loss shows up in the heartbeat and the log.
+        """
+        counts = self._tick_counts
+        counts[kind] += len(payload) if kind == 'trades' else 1
+        if self._feed_q.full():
+            dropped_kind, dropped = self._feed_q.get_nowait()
+            if dropped_kind == 'trades':
+                counts['dropped_trades'] += len(dropped)
+        self._feed_q.put_nowait((kind, payload))
+    
+    async def _feed_consumer(self):
+        """Drain queued feed messages in batches
+        
+        All trades in a batch are processed together; orderbook snapshots are
+        coalesced so only the latest one is handled.
+        """
+        q = self._feed_q
+        while True:
+            batch = [await q.get()]
+            while True:
+                try:
+                    batch.append(q.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            trades = []
+            orderbook = None
+            for kind, payload in batch:
+                if kind == 'trades':
+                    trades.extend(payload)
+                else:
+                    orderbook = payload
+            
+            try:
+                if trades:
+                    self.handle_real_time_trades(trades)
+                if orderbook:
+                    self.handle_real_time_orderbook(orderbook)
+                    self.data_manager.publish_orderbook(orderbook)
+            except Exception as e:
+                print(f"❌ Error processing real-time feed: {e}")
+                self.logger.error("Real-time feed processing error: %s", e)
+    
     def handle_real_time_trades(self, trades: List[Dict]):
         """Handle real-time trade data from WebSocket"""
         if trades:
+            logger = self.logger
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing %d real-time trades", len(trades))
+            
+            # Pack the batch once; learning and microstructure share the columns
+            trade_array = trades_to_array(trades)
+            
             if self.learning_phase_active:
-                print(f"🎓 Learning: Processing {len(trades)} trades...")
                 self.trade_events_collected += len(trades)
                 
                 # Enhanced trade analysis during learning
-                for trade in trades:
-                    size = trade.get('size', 0)
-                    if size > 0:
-                        self.learning_stats['trade_sizes'].append(size)
-            else:
-                print(f"💹 Trading: Processing {len(trades)} real-time trades...")
-                
-                # Track fills for adverse selection analysis
-                for trade in trades:
-                    # This would need to be filtered to only our fills in a real implementation
-                    # For now, we'll track all trades as market activity
-                    pass
+                sizes = trade_array['size']
+                self.learning_stats['trade_sizes'].extend(sizes[sizes > 0])
+            # While trading, fills for adverse selection analysis would need to be
+            # filtered to only ours; for now all trades count as market activity
             
             # Always feed to microstructure analyzer
-            self.microstructure.add_trade_events(trades)
+            self.microstructure.add_trade_events_np(trade_array)
         
     def handle_real_time_orderbook(self, orderbook: Dict):
         """Handle real-time orderbook data from WebSocket"""
         if orderbook:
+            logger = self.logger
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing orderbook update (mid: %.5f)", orderbook.get('mid_price', 0))
+            
             if self.learning_phase_active:
-                print(f"🎓 Learning: Processing orderbook update (mid: ${orderbook.get('mid_price', 0):.5f})")
                 self._collect_enhanced_learning_data(orderbook)
-            else:
-                print(f"💹 Trading: Processing orderbook update (mid: ${orderbook.get('mid_price', 0):.5f})")
             
-            # Always feed to microstructure analyzer
-            self.microstructure.add_orderbook_snapshot(orderbook)
+            # Feed the microstructure analyzer at most once per
+            # MICROSTRUCTURE_MIN_INTERVAL_MS; superseded snapshots are skipped
+            now = time.monotonic_ns()
+            if now - self._last_ob_ingest_ns >= self._ob_ingest_interval_ns:
+                self._last_ob_ingest_ns = now
+                self.microstructure.add_orderbook_snapshot(orderbook)
+    
+    async def _heartbeat(self):
+        """Print a once-per-second roll-up of real-time feed activity"""
+        counts = self._tick_counts
+        while True:
+            await asyncio.sleep(1)
+            if counts['ob'] or counts['trades']:
+                mode = "🎓 Learning" if self.learning_phase_active else "💹 Trading"
+                print(f"{mode}: {counts['ob']} orderbook updates, {counts['trades']} trades in last 1s")
+                counts['ob'] = 0
+                counts['trades'] = 0
+            if counts['dropped_trades']:
+                counts['missed_trades'] += counts['dropped_trades']
+                print(f"⚠️ Feed backlog: dropped {counts['dropped_trades']} trades in last 1s")
+                self.logger.warning("Feed queue full - dropped %d trades (%d missed in total)",
+                                    counts['dropped_trades'], counts['missed_trades'])
+                counts['dropped_trades'] = 0
     
     def _collect_enhanced_learning_data(self, orderbook: Dict):
         """Collect enhanced statistics during learning phase"""
         current_time = time.time()
+        stats = self.learning_stats
+        config = self.config
         
-        if self.learning_stats['first_snapshot_time'] is None:
-            self.learning_stats['first_snapshot_time'] = current_time
+        if stats['first_snapshot_time'] is None:
+            stats['first_snapshot_time'] = current_time
         
-        self.learning_stats['last_update_time'] = current_time
+        stats['last_update_time'] = current_time
         self.orderbook_snapshots_collected += 1
         
         # Enhanced data collection
@@ -133,50 +279,54 @@ class EnhancedHyperliquidMarketMaker:
             return
         
         # Collect spread data
-        if self.config.COLLECT_SPREAD_STATISTICS and spread_pct > 0:
-            self.learning_stats['spreads'].append(spread_pct)
+        if config.COLLECT_SPREAD_STATISTICS and spread_pct > 0:
+            stats['spreads'].append(spread_pct)
         
         # Collect price data
-        if self.config.COLLECT_PRICE_MOVEMENT_STATS and mid_price > 0:
-            self.learning_stats['mid_prices'].append(mid_price)
-        
-        # Enhanced volume imbalance analysis
-        if self.config.COLLECT_VOLUME_STATISTICS:
-            # Multi-level imbalance analysis
-            for depth in [3, 5, 10]:
-                bid_vol = sum(bid[1] for bid in bids[:depth])
-                ask_vol = sum(ask[1] for ask in asks[:depth])
-                
-                if bid_vol + ask_vol > 0:
-                    imbalance = (bid_vol - ask_vol) / (bid_vol + ask_vol)
-                    self.learning_stats['imbalances'].append({
-                        'depth': depth,
-                        'imbalance': imbalance,
-                        'timestamp': current_time
-                    })
-        
-        # Book stability analysis
-        if len(self.learning_stats['mid_prices']) > 5:
-            recent_prices = self.learning_stats['mid_prices'][-5:]
-            price_volatility = np.std(np.diff(recent_prices) / recent_prices[:-1])
-            self.learning_stats['book_stability_samples'].append(price_volatility)
+        if config.COLLECT_PRICE_MOVEMENT_STATS and mid_price > 0:
+            stats['mid_prices'].append(mid_price)
+        
+        # Per-snapshot depth/imbalance math runs in a compiled kernel on the
+        # level-size arrays provided by the feed (built here for other sources)
+        bid_vol = orderbook.get('bid_vol')
+        if bid_vol is None:
+            bid_vol = np.fromiter(map(level_size, bids[:20]), dtype=np.float64)
+        ask_vol = orderbook.get('ask_vol')
+        if ask_vol is None:
+            ask_vol = np.fromiter(map(level_size, asks[:20]), dtype=np.float64)
+        out = self._snapshot_out
+        snapshot_stats(bid_vol, ask_vol, out)
+        imbalances = out[:len(IMBALANCE_DEPTHS)]
+        concentration = out[CONCENTRATION]
+        
+        # Enhanced volume imbalance analysis (depths 3/5/10)
+        if config.COLLECT_VOLUME_STATISTICS:
+            depths = IMBALANCE_DEPTHS
+            if np.isnan(imbalances).any():
+                valid = ~np.isnan(imbalances)
+                imbalances = imbalances[valid]
+                depths = depths[valid]
+            stats['imbalances'].extend(imbalances)
+            stats['imbalance_depths'].extend(depths)
+            stats['imbalance_timestamps'].fill(current_time, len(imbalances))
+        
+        # Book stability analysis (rolling std of recent mid-price returns)
+        if self._prev_mid:
+            self._return_std.push((mid_price - self._prev_mid) / self._prev_mid)
+            if self._return_std.full:
+                stats['book_stability_samples'].append(self._return_std.std)
+        self._prev_mid = mid_price
         
         # Liquidity concentration analysis
-        total_bid_vol = sum(bid[1] for bid in bids[:20])
-        total_ask_vol = sum(ask[1] for ask in asks[:20])
-        top3_bid_vol = sum(bid[1] for bid in bids[:3])
-        top3_ask_vol = sum(ask[1] for ask in asks[:3])
-        
-        if total_bid_vol > 0 and total_ask_vol > 0:
-            concentration = (top3_bid_vol / total_bid_vol + top3_ask_vol / total_ask_vol) / 2
-            self.learning_stats['liquidity_samples'].append(concentration)
+        if concentration == concentration:  # not NaN
+            stats['liquidity_samples'].append(concentration)
 
     def _check_learning_phase_completion(self) -> bool:
         """Enhanced learning phase completion check"""
         if not self.learning_phase_active:
             return True
         
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Time-based completion
         if self.learning_start_time:
@@ -203,82 +353,131 @@ class EnhancedHyperliquidMarketMaker:
         
         return False
 
-    def _end_learning_phase(self):
-        """Enhanced learning phase completion with orderbook analysis setup"""
+    async def _end_learning_phase(self):
+        """Enhanced learning phase completion with orderbook analysis setup
+        
+        The summary statistics are computed on a worker thread so the event
+        loop keeps draining the real-time feed during the transition.
+        """
         self.learning_phase_active = False
-        self.trading_start_time = time.time()
+        self._tick = self._trading_tick
+        self.trading_start_time = time.monotonic()
+        
+        # No more samples are appended once learning is inactive, so the
+        # buffer views are stable while the worker reads them
+        samples = {
+            key: buffer.view() for key, buffer in self.learning_stats.items()
+            if isinstance(buffer, SampleBuffer)
+        }
+        summary = await asyncio.to_thread(self._compute_learning_summary, samples)
+        self._apply_learning_summary(summary)
+    
+    @staticmethod
+    def _compute_learning_summary(samples: Dict[str, np.ndarray]) -> Dict:
+        """Percentile, price-move and strategy baseline statistics over the retained samples
+        
+        Pure function of the sample arrays, so it is safe to run off the
+        event loop. Means/std/ranges come from the buffers' running stats.
+        """
+        summary = {'baselines': OrderbookAnalyzer.compute_baselines(samples)}
+        
+        if len(samples['spreads']):
+            summary['spreads'] = np.percentile(samples['spreads'], [5, 95])
+        
+        if len(samples['trade_sizes']):
+            summary['trade_sizes'] = np.percentile(samples['trade_sizes'], [25, 50, 95])
+        
+        if len(samples['imbalances']):
+            summary['imbalances'] = np.percentile(np.abs(samples['imbalances']), 80)
+        
+        if len(samples['book_stability_samples']):
+            summary['book_stability_samples'] = np.percentile(samples['book_stability_samples'], 80)
+        
+        if len(samples['liquidity_samples']):
+            summary['liquidity_samples'] = np.percentile(samples['liquidity_samples'], 80)
+        
+        prices = samples['mid_prices']
+        if len(prices) > 1:
+            price_changes = np.diff(prices) / prices[:-1] * 100
+            abs_changes = np.abs(price_changes)
+            summary['mid_prices'] = (np.std(price_changes), np.max(abs_changes), np.percentile(abs_changes, 95))
+        
+        return summary
+    
+    def _apply_learning_summary(self, summary: Dict):
+        """Print the learning summary and hand the baselines to the strategy"""
+        stats = self.learning_stats
         
         print("\n" + "=" * 60)
         print("🎓 ENHANCED LEARNING PHASE COMPLETE - COMPREHENSIVE SUMMARY")
         print("=" * 60)
         
-        learning_duration = time.time() - self.learning_start_time
+        learning_duration = time.monotonic() - self.learning_start_time
         print(f"⏰ Learning duration: {learning_duration/60:.1f} minutes")
         print(f"📊 Data collected:")
         print(f"   - Orderbook snapshots: {self.orderbook_snapshots_collected}")
         print(f"   - Trade events: {self.trade_events_collected}")
-        print(f"   - Spread samples: {len(self.learning_stats['spreads'])}")
-        print(f"   - Imbalance samples: {len(self.learning_stats['imbalances'])}")
-        print(f"   - Liquidity samples: {len(self.learning_stats['liquidity_samples'])}")
+        print(f"   - Spread samples: {len(stats['spreads'])}")
+        print(f"   - Imbalance samples: {len(stats['imbalances'])}")
+        print(f"   - Liquidity samples: {len(stats['liquidity_samples'])}")
         
         # Enhanced spread analysis
-        if self.learning_stats['spreads']:
-            spreads = np.array(self.learning_stats['spreads'])
+        if 'spreads' in summary:
+            spread_buf = stats['spreads']
+            p5, p95 = summary['spreads']
             print(f"📈 Enhanced spread analysis:")
-            print(f"   - Average spread: {np.mean(spreads):.4f}%")
-            print(f"   - Spread range: {np.min(spreads):.4f}% - {np.max(spreads):.4f}%")
-            print(f"   - Spread volatility: {np.std(spreads):.4f}%")
-            print(f"   - 95th percentile: {np.percentile(spreads, 95):.4f}%")
-            print(f"   - 5th percentile: {np.percentile(spreads, 5):.4f}%")
+            print(f"   - Average spread: {spread_buf.mean:.4f}%")
+            print(f"   - Spread range: {spread_buf.min:.4f}% - {spread_buf.max:.4f}%")
+            print(f"   - Spread volatility: {spread_buf.std:.4f}%")
+            print(f"   - 95th percentile: {p95:.4f}%")
+            print(f"   - 5th percentile: {p5:.4f}%")
         
         # Trade size analysis
-        if self.learning_stats['trade_sizes']:
-            sizes = np.array(self.learning_stats['trade_sizes'])
+        if 'trade_sizes' in summary:
+            p25, p50, p95 = summary['trade_sizes']
             print(f"💹 Trade size analysis:")
-            print(f"   - Average trade size: {np.mean(sizes):.4f}")
-            print(f"   - Median trade size: {np.median(sizes):.4f}")
-            print(f"   - Large trade threshold (95th): {np.percentile(sizes, 95):.4f}")
-            print(f"   - Small trade threshold (25th): {np.percentile(sizes, 25):.4f}")
+            print(f"   - Average trade size: {stats['trade_sizes'].mean:.4f}")
+            print(f"   - Median trade size: {p50:.4f}")
+            print(f"   - Large trade threshold (95th): {p95:.4f}")
+            print(f"   - Small trade threshold (25th): {p25:.4f}")
         
         # Enhanced imbalance analysis
-        if self.learning_stats['imbalances']:
-            imbalances = [item['imbalance'] for item in self.learning_stats['imbalances']]
-            imbalances_array = np.array(imbalances)
+        if 'imbalances' in summary:
+            imbalance_buf = stats['imbalances']
             print(f"⚖️  Enhanced imbalance analysis:")
-            print(f"   - Average imbalance: {np.mean(imbalances_array):.4f}")
-            print(f"   - Imbalance volatility: {np.std(imbalances_array):.4f}")
-            print(f"   - Max bid pressure: {np.max(imbalances_array):.4f}")
-            print(f"   - Max ask pressure: {np.min(imbalances_array):.4f}")
-            print(f"   - Strong imbalance threshold: {np.percentile(np.abs(imbalances_array), 80):.4f}")
+            print(f"   - Average imbalance: {imbalance_buf.mean:.4f}")
+            print(f"   - Imbalance volatility: {imbalance_buf.std:.4f}")
+            print(f"   - Max bid pressure: {imbalance_buf.max:.4f}")
+            print(f"   - Max ask pressure: {imbalance_buf.min:.4f}")
+            print(f"   - Strong imbalance threshold: {summary['imbalances']:.4f}")
         
         # Market stability analysis
-        if self.learning_stats['book_stability_samples']:
-            stability = np.array(self.learning_stats['book_stability_samples'])
+        if 'book_stability_samples' in summary:
+            stability_buf = stats['book_stability_samples']
             print(f"📊 Market stability analysis:")
-            print(f"   - Average price volatility: {np.mean(stability):.6f}")
-            print(f"   - Volatility range: {np.min(stability):.6f} - {np.max(stability):.6f}")
-            print(f"   - High volatility threshold: {np.percentile(stability, 80):.6f}")
+            print(f"   - Average price volatility: {stability_buf.mean:.6f}")
+            print(f"   - Volatility range: {stability_buf.min:.6f} - {stability_buf.max:.6f}")
+            print(f"   - High volatility threshold: {summary['book_stability_samples']:.6f}")
         
         # Liquidity concentration
-        if self.learning_stats['liquidity_samples']:
-            concentration = np.array(self.learning_stats['liquidity_samples'])
+        if 'liquidity_samples' in summary:
+            concentration_buf = stats['liquidity_samples']
             print(f"💧 Liquidity analysis:")
-            print(f"   - Average concentration: {np.mean(concentration):.3f}")
-            print(f"   - Concentration volatility: {np.std(concentration):.3f}")
-            print(f"   - High concentration threshold: {np.percentile(concentration, 80):.3f}")
+            print(f"   - Average concentration: {concentration_buf.mean:.3f}")
+            print(f"   - Concentration volatility: {concentration_buf.std:.3f}")
+            print(f"   - High concentration threshold: {summary['liquidity_samples']:.3f}")
         
         # Price movement analysis
-        if self.learning_stats['mid_prices'] and len(self.learning_stats['mid_prices']) > 1:
-            prices = np.array(self.learning_stats['mid_prices'])
-            price_changes = np.diff(prices) / prices[:-1] * 100
+        if 'mid_prices' in summary:
+            move_std, move_max, move_p95 = summary['mid_prices']
             print(f"💰 Price movement analysis:")
-            print(f"   - Price volatility (std): {np.std(price_changes):.4f}%")
-            print(f"   - Max price move: {np.max(np.abs(price_changes)):.4f}%")
-            print(f"   - 95th percentile move: {np.percentile(np.abs(price_changes), 95):.4f}%")
+            print(f"   - Price volatility (std): {move_std:.4f}%")
+            print(f"   - Max price move: {move_max:.4f}%")
+            print(f"   - 95th percentile move: {move_p95:.4f}%")
         
         # Update strategy baselines with learning data
         print(f"\n🎯 Updating strategy baselines...")
-        self.strategy.update_baselines_from_learning(self.learning_stats)
+        self.strategy.update_baselines_from_learning(self.learning_stats, summary['baselines'])
         
         # Get microstructure baseline
         signals = self.microstructure.get_current_signals()
@@ -295,14 +494,14 @@ class EnhancedHyperliquidMarketMaker:
         print(f"   ✅ Smart order placement algorithms active")
         print("=" * 60)
         
-        self.logger.info(f"Enhanced learning phase completed. Collected comprehensive market data in {learning_duration/60:.1f} minutes")
+        self.logger.info("Enhanced learning phase completed. Collected comprehensive market data in %.1f minutes", learning_duration / 60)
 
     def _log_learning_progress(self):
         """Enhanced learning progress logging"""
         if not self.learning_phase_active or not self.learning_start_time:
             return
         
-        elapsed_time = time.time() - self.learning_start_time
+        elapsed_time = time.monotonic() - self.learning_start_time
         remaining_time = self.config.LEARNING_PHASE_DURATION - elapsed_time
         progress_pct = (elapsed_time / self.config.LEARNING_PHASE_DURATION) * 100
         
@@ -318,10 +517,10 @@ class EnhancedHyperliquidMarketMaker:
         if self.learning_stats['spreads']:
             recent_spreads = self.learning_stats['spreads'][-10:]
             avg_recent_spread = np.mean(recent_spreads)
-            print(f"   📈 Recent avg spread: {avg_recent_spread:.4f}%")
+            print(f"   📈 Recent avg spread: {avg_recent_spread:.4f}% (overall {self.learning_stats['spreads'].mean:.4f}% ± {self.learning_stats['spreads'].std:.4f}%)")
         
         if self.learning_stats['imbalances']:
-            recent_imbalances = [item['imbalance'] for item in self.learning_stats['imbalances'][-10:]]
+            recent_imbalances = self.learning_stats['imbalances'][-10:]
             avg_recent_imbalance = np.mean(recent_imbalances)
             print(f"   ⚖️  Recent avg imbalance: {avg_recent_imbalance:.3f}")
         
@@ -330,11 +529,21 @@ class EnhancedHyperliquidMarketMaker:
         print(f"   🧠 Current signals: confidence={signals.flow_confidence:.3f}, momentum={signals.overall_momentum:.3f}")
 
     def _setup_logging(self):
-        """Setup logging configuration"""
-        logging.basicConfig(
-            level=getattr(logging, self.config.LOG_LEVEL),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        """Setup logging configuration
+        
+        Records are queued and written to stderr by a background listener
+        thread so log I/O never blocks the event loop.
+        """
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(getattr(logging, self.config.LOG_LEVEL))
+        
+        self._log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        self._log_listener.start()
         return logging.getLogger(__name__)
     
     async def initialize(self):
@@ -355,13 +564,25 @@ class EnhancedHyperliquidMarketMaker:
         if not self.config.ENABLE_TRADING:
             print("⚠️  Trading disabled - paper trading mode")
         
+        print("⚙️  Compiling learning and microstructure kernels...")
+        learning_kernels.warm_up()
+        microstructure_kernels.warm_up()
+        print("🔥 Warming up pricing path...")
+        self._warm_up()
+        
         print("\n🔌 Initializing data connections...")
         await self.data_manager.initialize()
+        self._ws_enabled = bool(getattr(self.data_manager, 'real_time_enabled', False))
+        # Market data and order traffic share one pooled connection set
+        self.trading_client.use_session(self.data_manager.session)
         
         # Set up real-time callbacks
         print("🔗 Setting up enhanced real-time data callbacks...")
-        self.data_manager.set_trade_callback(self.handle_real_time_trades)
-        self.data_manager.set_orderbook_callback(self.handle_real_time_orderbook)
+        self._loop = asyncio.get_running_loop()
+        self.data_manager.set_trade_callback(self._on_ws_trades)
+        self.data_manager.set_orderbook_callback(self._on_ws_orderbook)
+        self._feed_task = asyncio.create_task(self._feed_consumer())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
         
         # Display symbol-specific parameters
         symbol_info = self.data_manager.get_symbol_info()
@@ -374,7 +595,7 @@ class EnhancedHyperliquidMarketMaker:
         
         # Initialize learning phase if enabled
         if self.config.ENABLE_LEARNING_PHASE:
-            self.learning_start_time = time.time()
+            self.learning_start_time = time.monotonic()
             print(f"\n🎓 Starting Enhanced Learning Phase ({self.config.LEARNING_PHASE_DURATION/60:.1f} minutes)")
             print("   📚 Collecting comprehensive market microstructure data")
             print("   📊 Analyzing orderbook patterns and liquidity distribution")
@@ -385,6 +606,39 @@ class EnhancedHyperliquidMarketMaker:
         print("=" * 60)
         self.logger.info("Enhanced initialization complete")
     
+    def _warm_up(self):
+        """Run one synthetic tick through analysis and pricing
+        
+        Touches the same code paths as a live tick (imports, NumPy kernels,
+        caches) before the first real orderbook arrives. Throwaway instances
+        are used so no history, learning stats or risk state is kept.
+        """
+        bids = [[100.0 - 0.01 * (i + 1), 1.0] for i in range(20)]
+        asks = [[100.0 + 0.01 * (i + 1), 1.0] for i in range(20)]
+        orderbook = {
+            'symbol': self.config.SYMBOL, 'bids': bids, 'asks': asks,
+            'best_bid': bids[0][0], 'best_ask': asks[0][0], 'mid_price': 100.0,
+            'spread': 0.02, 'spread_pct': 0.02, 'tick_size': 0.01, 'timestamp': time.time()
+        }
+        trades = [{'timestamp': time.time(), 'price': 100.0, 'size': 1.0, 'side': side}
+                  for side in ('B', 'A')]
+        
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                microstructure = MarketMicrostructure(self.config)
+                microstructure.add_orderbook_snapshot(orderbook)
+                microstructure.add_trade_events_np(trades_to_array(trades))
+                signals = microstructure.get_current_signals()
+                
+                strategy = type(self.strategy)(self.config)
+                strategy.calculate_fair_price(orderbook)
+                generate = (getattr(strategy, 'generate_enhanced_orders_with_risk', None)
+                            or strategy.generate_orders)
+                generate(orderbook, None, 1000.0, signals)
+        except Exception as e:
+            # Warm-up is best effort - the live path reports its own errors
+            self.logger.warning("Warm-up tick failed: %s", e)
+    
     async def cleanup(self):
         """Cleanup all components"""
         print("\n" + "=" * 60)
@@ -392,157 +646,170 @@ class EnhancedHyperliquidMarketMaker:
         print("=" * 60)
         
         self.logger.info("Cleaning up enhanced components...")
+        for task in (self._feed_task, self._heartbeat_task):
+            if task:
+                task.cancel()
         await self.data_manager.cleanup()
         print("✅ Enhanced cleanup complete!")
         print("=" * 60)
         self.logger.info("Enhanced cleanup complete")
+        self._log_listener.stop()
     
     async def update_positions_and_orders(self):
         """Update position and order information from exchange"""
-        if self.learning_phase_active:
-            print("🎓 Learning: Updating account state (no trading)")
-        else:
-            print("\n📊 UPDATING ACCOUNT STATE")
-            print("-" * 40)
+        logger = self.logger
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         if not self.trading_client.user_address:
-            print("⚠️  No user address - skipping account update")
+            if debug:
+                logger.debug("No user address - skipping account update")
             return
             
         try:
             # Use MASTER wallet address for account data
             master_address = self.config.MASTER_WALLET_ADDRESS
             
-            # Fetch account state
-            if not self.learning_phase_active:
-                print("💰 Fetching account information...")
-            account_info = await self.data_manager.get_account_info(master_address)
-            if account_info:
-                if not self.learning_phase_active:
-                    print("✅ Account info retrieved - updating position tracker")
-                self.position_tracker.update_from_account_state(account_info)
-            else:
-                if not self.learning_phase_active:
-                    print("❌ Failed to retrieve account info")
-            
             # Use specified account address for order queries
             account_address = "0x32BE427D44f7eA8076f62190bd3a7d0FDceF076c"
             
-            # Fetch open orders
-            if not self.learning_phase_active:
-                print("📋 Fetching open orders...")
+            # Fetch account state and open orders concurrently
+            account_info, open_orders = await asyncio.gather(
+                self.data_manager.get_account_info(master_address),
+                self.data_manager.get_open_orders(account_address),
+                return_exceptions=True
+            )
             
-            open_orders = await self.data_manager.get_open_orders(account_address)
-            if open_orders is not None:
-                if not self.learning_phase_active:
-                    print(f"✅ Retrieved {len(open_orders)} open orders")
+            if isinstance(account_info, Exception):
+                logger.error("Error fetching account info: %s", account_info)
+            elif account_info:
+                self.position_tracker.update_from_account_state(account_info)
+            elif debug:
+                logger.debug("No account info retrieved")
+            
+            if isinstance(open_orders, Exception):
+                logger.error("Error fetching open orders: %s", open_orders)
+            elif open_orders is not None:
+                if debug:
+                    logger.debug("Retrieved %d open orders", len(open_orders))
                 self.position_tracker.update_from_open_orders(open_orders)
-            else:
-                if not self.learning_phase_active:
-                    print("❌ Failed to retrieve open orders")
+            elif debug:
+                logger.debug("No open orders retrieved")
         
         except Exception as e:
-            print(f"❌ Error updating positions and orders: {e}")
-            self.logger.error(f"Error updating positions and orders: {e}")
+            logger.error("Error updating positions and orders: %s", e)
 
     async def update_market_data(self):
         """Update market data with enhanced analysis"""
-        if not self.learning_phase_active:
-            print("\n📈 UPDATING ENHANCED MARKET DATA")
-            print("-" * 40)
+        logger = self.logger
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         try:
-            # Fetch orderbook
-            if not self.learning_phase_active:
-                print("📊 Fetching orderbook for enhanced analysis...")
-            orderbook = await self.data_manager.get_orderbook()
+            # Fetch orderbook and recent trades concurrently
+            orderbook, recent_trades = await asyncio.gather(
+                self.data_manager.get_orderbook(),
+                self.data_manager.get_recent_trades(),
+                return_exceptions=True
+            )
+            
+            if isinstance(orderbook, Exception):
+                logger.error("Error fetching orderbook: %s", orderbook)
+                orderbook = None
+            if isinstance(recent_trades, Exception):
+                logger.error("Error fetching recent trades: %s", recent_trades)
+                recent_trades = []
+            
             if orderbook:
                 if self.learning_phase_active:
                     self._collect_enhanced_learning_data(orderbook)
-                else:
-                    print("✅ Orderbook retrieved - performing enhanced analysis")
                 self.microstructure.add_orderbook_snapshot(orderbook)
-            else:
-                if not self.learning_phase_active:
-                    print("❌ Failed to retrieve orderbook")
-                return None
+            elif debug:
+                logger.debug("No orderbook retrieved")
             
-            # Fetch recent trades
-            if not self.learning_phase_active:
-                print("💹 Fetching recent trades for flow analysis...")
-            recent_trades = await self.data_manager.get_recent_trades()
             if recent_trades:
                 if self.learning_phase_active:
                     self.trade_events_collected += len(recent_trades)
-                    for trade in recent_trades:
-                        size = trade.get('size', 0)
-                        if size > 0:
-                            self.learning_stats['trade_sizes'].append(size)
-                else:
-                    print(f"✅ Retrieved {len(recent_trades)} new trades - updating analysis")
+                    sizes = np.fromiter((trade.get('size', 0) for trade in recent_trades), dtype=np.float64, count=len(recent_trades))
+                    self.learning_stats['trade_sizes'].extend(sizes[sizes > 0])
+                if debug:
+                    logger.debug("Retrieved %d new trades", len(recent_trades))
                 self.microstructure.add_trade_events(recent_trades)
-            else:
-                if not self.learning_phase_active:
-                    print("📊 No new trades since last update")
             
             return orderbook
                     
         except Exception as e:
-            print(f"❌ Error updating enhanced market data: {e}")
-            self.logger.error(f"Error updating enhanced market data: {e}")
+            logger.error("Error updating enhanced market data: %s", e)
             return None
 
-    async def execute_enhanced_trading_logic(self, orderbook: Dict):
-        """Execute enhanced trading logic with integrated risk management"""
+    def _recent_trade_dicts(self) -> List[Dict]:
+        """Latest trades as dicts for strategy consumption
+        
+        Only the FLOW_TRADE_WINDOW trades the fair-price flow model reads are
+        converted, not the whole microstructure history.
+        """
+        return self.microstructure.recent_trades(FLOW_TRADE_WINDOW)
+    
+    async def execute_enhanced_trading_logic(self, orderbook: Dict, position=None,
+                                             account_value: Optional[float] = None) -> Tuple[Optional[float], Optional[MarketSignals]]:
+        """Execute enhanced trading logic with integrated risk management
+        
+        position/account_value are the loop's per-iteration snapshot (queried
+        here if not given). Returns (fair_price, signals), each None when the
+        logic exited before computing it.
+        """
         if self.learning_phase_active:
             # Skip trading during learning phase
-            return
+            return None, None
+
+        # Hot-path lookups bound once per call
+        logger = self.logger
+        tracker = self.position_tracker
+        strategy = self.strategy
+        symbol = self.config.SYMBOL
 
         # Check dynamic configuration
         enable_trading = self.dynamic_config.get('enable_trading', True)
         if not enable_trading:
-            print("⏸️  Trading DISABLED by dynamic config - skipping trading logic")
-            return
+            logger.debug("Trading disabled by dynamic config - skipping trading logic")
+            return None, None
 
         risk_multiplier = self.dynamic_config.get('risk_multiplier', 1.0)
         max_orders_per_side = self.dynamic_config.get('max_orders_per_side', self.config.MAX_ORDERS_PER_SIDE)
 
-        print("\n🎯 EXECUTING ENHANCED TRADING LOGIC WITH RISK MANAGEMENT")
-        print("-" * 60)
-        print(f"🔧 Dynamic Config: trading={enable_trading}, risk_mult={risk_multiplier:.2f}, max_orders={max_orders_per_side}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Executing trading logic - dynamic config: trading=%s, risk_mult=%.2f, max_orders=%d",
+                         enable_trading, risk_multiplier, max_orders_per_side)
 
         try:
             current_price = orderbook.get('mid_price', 0)
-            position = self.position_tracker.get_position(self.config.SYMBOL)
+            if position is None:
+                position = tracker.get_position(symbol)
             
             # 1. IMMEDIATE RISK CHECKS (NEW!)
-            print("🛡️  Performing risk checks...")
-            
             # Check for stop-loss trigger
             if (position and 
-                hasattr(self.strategy, 'check_stop_loss_trigger') and 
-                self.strategy.check_stop_loss_trigger(position, current_price)):
+                self._check_stop_loss is not None and 
+                self._check_stop_loss(position, current_price)):
                 
                 print("🛑 STOP-LOSS TRIGGERED - Generating emergency exit order")
-                stop_order = self.strategy.generate_stop_loss_order(position, current_price)
+                stop_order = strategy.generate_stop_loss_order(position, current_price)
                 if stop_order:
                     # Execute stop-loss immediately
                     order_ids = await self.trading_client.place_orders([stop_order])
                     if order_ids and order_ids[0]:
                         print(f"✅ Stop-loss order placed: {order_ids[0]}")
                         # Update position tracker to reflect closure
-                        self.position_tracker.positions[self.config.SYMBOL] = None
+                        tracker.positions[symbol] = None
                     else:
                         print("❌ Failed to place stop-loss order!")
-                    return  # Skip normal trading logic
+                    return None, None  # Skip normal trading logic
             
             # Check for profit-taking (NEW!)
-            if (position and 
-                hasattr(self.strategy, 'check_profit_taking_trigger')):
-                close_size = self.strategy.check_profit_taking_trigger(position, current_price)
+            if position and self._check_profit_taking is not None:
+                close_size = self._check_profit_taking(position, current_price)
                 if close_size:
                     print("💰 PROFIT-TAKING TRIGGERED")
-                    profit_order = self.strategy.generate_profit_taking_order(position, current_price)
+                    profit_order = strategy.generate_profit_taking_order(position, current_price)
                     if profit_order:
                         order_ids = await self.trading_client.place_orders([profit_order])
                         if order_ids and order_ids[0]:
@@ -553,314 +820,266 @@ class EnhancedHyperliquidMarketMaker:
                     # Continue with normal logic after profit-taking
             
             # 2. GET MARKET ANALYSIS (existing code)
-            print("🧠 Retrieving microstructure signals...")
             signals = self.microstructure.get_current_signals()
-            signal_summary = self.microstructure.get_signal_summary()
-            print(f"📊 Microstructure signals: {signal_summary}")
-            
-            # Get enhanced strategy status
-            strategy_status = self.strategy.get_strategy_status(orderbook)
-            print(f"📈 Enhanced strategy status:")
-            print(f"   - Market condition: {strategy_status.get('condition_type', 'UNKNOWN')}")
-            print(f"   - Adverse risk: {strategy_status.get('adverse_risk', 0):.3f}")
+            if debug:
+                logger.debug("Microstructure signals: %s", self.microstructure.get_signal_summary())
+                
+                # Get enhanced strategy status
+                strategy_status = strategy.get_strategy_status(orderbook)
+                logger.debug("Strategy status: condition=%s, adverse_risk=%.3f",
+                             strategy_status.get('condition_type', 'UNKNOWN'), strategy_status.get('adverse_risk', 0))
             
             # 3. DISPLAY RISK STATUS (NEW!)
-            if hasattr(self.strategy, 'get_risk_status'):
-                risk_status = self.strategy.get_risk_status(position, current_price)
+            if debug and self._get_risk_status is not None:
+                risk_status = self._get_risk_status(position, current_price)
                 if risk_status.get('no_position'):
-                    print("📊 Risk Status: FLAT POSITION")
+                    logger.debug("Risk status: flat position")
                 else:
-                    print(f"🛡️  Risk Status:")
-                    
-                    # Safe formatting with null checks
-                    pos_size = risk_status.get('position_size', 0)
-                    entry_price = risk_status.get('entry_price', 0)
-                    unrealized_pnl = risk_status.get('unrealized_pnl', 0)
-                    stop_loss_price = risk_status.get('stop_loss_price', 0)
-                    profit_target_price = risk_status.get('profit_target_price', 0)
-                    stop_distance = risk_status.get('stop_loss_distance', 0)
-                    profit_levels_hit = risk_status.get('profit_levels_hit', [])
-                    
-                    print(f"   - Position: {pos_size:.4f}")
-                    if entry_price > 0:
-                        print(f"   - Entry: ${entry_price:.5f}")
-                    else:
-                        print(f"   - Entry: Not tracked")
-                        
-                    print(f"   - Unrealized PnL: ${unrealized_pnl:.2f}")
-                    
-                    if stop_loss_price > 0:
-                        print(f"   - Stop-loss: ${stop_loss_price:.5f}")
-                        print(f"   - Distance to stop: {stop_distance:.2f}%")
-                    else:
-                        print(f"   - Stop-loss: Not set")
-                        
-                    if profit_target_price > 0:
-                        print(f"   - Profit target: ${profit_target_price:.5f}")
-                    else:
-                        print(f"   - Profit target: Not set")
-                        
-                    if profit_levels_hit:
-                        print(f"   - Profit levels hit: {profit_levels_hit}")
+                    logger.debug(
+                        "Risk status: position=%.4f entry=%.5f upnl=%.2f stop=%.5f (%.2f%% away) target=%.5f levels_hit=%s",
+                        risk_status.get('position_size', 0), risk_status.get('entry_price', 0),
+                        risk_status.get('unrealized_pnl', 0), risk_status.get('stop_loss_price', 0),
+                        risk_status.get('stop_loss_distance', 0), risk_status.get('profit_target_price', 0),
+                        risk_status.get('profit_levels_hit', [])
+                    )
             
             # 4. EXISTING TRADING LOGIC (mostly unchanged)
-            current_orders = self.position_tracker.get_open_orders(self.config.SYMBOL)
-            print(f"📋 Current state: {len(current_orders)} open orders")
-            if position:
-                print(f"📊 Position: {position.size:.4f} {self.config.SYMBOL}")
-            else:
-                print("📊 No position")
+            current_orders = tracker.get_open_orders(symbol)
+            if debug:
+                logger.debug("Current state: %d open orders, position %.4f %s",
+                             len(current_orders), position.size if position else 0.0, symbol)
             
             # Calculate fair price with recent trades for flow adjustment
-            recent_trades_list = list(self.microstructure.trade_history) if hasattr(self.microstructure, 'trade_history') else []
-            # Convert TradeEvent objects to dicts for strategy consumption
-            recent_trades_dicts = [
-                {'price': t.price, 'size': t.size, 'side': 'B' if t.is_aggressive_buy else 'A', 'timestamp': t.timestamp}
-                for t in recent_trades_list
-            ] if recent_trades_list else []
-
-            fair_price = self.strategy.calculate_fair_price(orderbook, recent_trades_dicts)
+            fair_price = strategy.calculate_fair_price(orderbook, self._recent_trade_dicts())
             if not fair_price:
                 print("❌ Cannot determine fair price - skipping trading logic")
-                return
-            
-            # Enhanced order cancellation
-            if current_orders and fair_price:
-                print("🔍 Enhanced order evaluation...")
-                orders_to_cancel = self.strategy.should_cancel_orders(current_orders, fair_price, signals)
-                
-                if orders_to_cancel:
-                    print(f"❌ Cancelling {len(orders_to_cancel)} orders...")
-                    success = await self.trading_client.cancel_orders(orders_to_cancel)
-                    if success:
-                        print("✅ Orders cancelled successfully")
-                        for order_id in orders_to_cancel:
-                            if order_id in self.position_tracker.open_orders:
-                                order = self.position_tracker.open_orders[order_id]
-                                # Log cancellation event
-                                self.metrics_logger.log_order_event(
-                                    event_type='cancelled',
-                                    side='buy' if order.side == 'B' else 'sell',
-                                    price=float(order.limit_px),
-                                    size=float(order.sz),
-                                    order_id=order_id
-                                )
-                                del self.position_tracker.open_orders[order_id]
-                    else:
-                        print("❌ Failed to cancel some orders")
+                return None, signals
             
+            # Decide cancellations and new orders up front so both exchange
+            # round trips run concurrently instead of back to back
+            orders_to_cancel = (strategy.should_cancel_orders(current_orders, fair_price, signals)
+                                if current_orders else None)
+
             # Generate new orders with risk management (UPDATED!)
             max_total_orders = max_orders_per_side * 2
             current_order_count = len(current_orders)
+            at_capacity = current_order_count >= max_total_orders
+            if debug:
+                logger.debug("Order capacity: %d/%d", current_order_count, max_total_orders)
 
-            print(f"📊 Order capacity: {current_order_count}/{max_total_orders}")
+            # Steady state: nothing to cancel and no room for new orders
+            if at_capacity and not orders_to_cancel:
+                if debug:
+                    logger.debug("Maximum orders reached - not generating new orders")
+                return fair_price, signals
 
-            if current_order_count < max_total_orders:
-                print("🎯 Generating enhanced orders with risk management...")
-                account_value = self.position_tracker.get_account_value()
+            new_orders = None
+            if not at_capacity:
+                if account_value is None:
+                    account_value = tracker.get_account_value()
 
                 # Apply risk multiplier to account value for sizing
                 adjusted_account_value = account_value * risk_multiplier
 
-                # Use risk-aware order generation (NEW!)
-                if hasattr(self.strategy, 'generate_enhanced_orders_with_risk'):
-                    new_orders = self.strategy.generate_enhanced_orders_with_risk(
-                        orderbook, position, adjusted_account_value, signals
-                    )
-                else:
-                    # Fallback to normal order generation
-                    new_orders = self.strategy.generate_orders(orderbook, position, adjusted_account_value, signals)
-                
+                # Use risk-aware order generation (falls back to normal generation)
+                new_orders = self._gen_orders(orderbook, position, adjusted_account_value, signals)
+                if not new_orders:
+                    logger.debug("No orders generated (risk management or unfavorable conditions)")
+                elif current_orders:
+                    # Open orders already on a target price stay put
+                    orders_to_cancel, new_orders = strategy.reconcile_orders(
+                        current_orders, orders_to_cancel, new_orders)
+            else:
+                logger.debug("Maximum orders reached - not generating new orders")
+
+            if not orders_to_cancel and not new_orders:
+                return fair_price, signals
+
+            verbose = self.config.VERBOSE
+            if verbose:
+                if orders_to_cancel:
+                    print(f"❌ Cancelling {len(orders_to_cancel)} orders...")
                 if new_orders:
                     print(f"📦 Placing {len(new_orders)} risk-managed orders...")
-                    order_ids = await self.trading_client.place_orders(new_orders)
-                    
-                    # Track successful orders
-                    successful_orders = 0
-                    for i, order_id in enumerate(order_ids):
-                        if order_id and i < len(new_orders):
-                            order_data = {
-                                'oid': order_id,
-                                'coin': new_orders[i]['coin'],
-                                'side': 'B' if new_orders[i]['is_buy'] else 'A',
-                                'sz': str(new_orders[i]['sz']),
-                                'limitPx': str(new_orders[i].get('limit_px', 0))
-                            }
-                            order = Order(order_data)
-                            self.position_tracker.open_orders[order_id] = order
-                            successful_orders += 1
-                            print(f"   ✅ Tracking risk-managed order: {order_id}")
+            cancel_result, order_ids = await asyncio.gather(
+                self.trading_client.cancel_orders(orders_to_cancel) if orders_to_cancel else asyncio.sleep(0),
+                self.trading_client.place_orders(new_orders) if new_orders else asyncio.sleep(0, []),
+                return_exceptions=True
+            )
 
-                            # Log order event to InfluxDB
-                            self.metrics_logger.log_order_event(
-                                event_type='placed',
-                                side='buy' if new_orders[i]['is_buy'] else 'sell',
-                                price=float(new_orders[i].get('limit_px', 0)),
-                                size=float(new_orders[i]['sz']),
-                                order_id=order_id
-                            )
+            if orders_to_cancel:
+                if cancel_result is True:
+                    if verbose:
+                        print("✅ Orders cancelled successfully")
+                    cancelled = tracker.remove_orders_fast(orders_to_cancel)
+                    logger.debug("Removed %d cancelled orders from tracking", len(cancelled))
 
-                    print(f"📈 Successfully placed {successful_orders}/{len(new_orders)} risk-managed orders")
+                    # Log cancellation events
+                    for order in cancelled:
+                        self.metrics_logger.log_order_event(
+                            event_type='cancelled',
+                            side=order.side,
+                            price=order.price,
+                            size=order.size,
+                            order_id=order.order_id
+                        )
+                elif isinstance(cancel_result, Exception):
+                    print(f"❌ Error cancelling orders: {cancel_result}")
+                    logger.error("Error cancelling orders: %s", cancel_result)
                 else:
-                    print("⚠️  No orders generated (risk management or unfavorable conditions)")
-            else:
-                print("📊 Maximum orders reached - not generating new orders")
+                    print("❌ Failed to cancel some orders")
+
+            if isinstance(order_ids, Exception):
+                print(f"❌ Error placing orders: {order_ids}")
+                logger.error("Error placing orders: %s", order_ids)
+            elif new_orders:
+                # Track successful orders (zip pairs each ID with its order)
+                placed = [(order_id, order) for order_id, order in zip(order_ids, new_orders) if order_id]
+                tracker.track_orders({
+                    order_id: Order(
+                        order_id=order_id,
+                        symbol=order['coin'],
+                        side='buy' if order['is_buy'] else 'sell',
+                        size=float(order['sz']),
+                        price=float(order.get('limit_px', 0)),
+                        timestamp=0,
+                        reduce_only=order.get('reduce_only', False)
+                    )
+                    for order_id, order in placed
+                })
+                successful_orders = len(placed)
+                logger.debug("Tracking %d risk-managed orders", successful_orders)
+
+                # Log order events to InfluxDB
+                for order_id, order in placed:
+                    self.metrics_logger.log_order_event(
+                        event_type='placed',
+                        side='buy' if order['is_buy'] else 'sell',
+                        price=float(order.get('limit_px', 0)),
+                        size=float(order['sz']),
+                        order_id=order_id
+                    )
+
+                if verbose:
+                    print(f"📈 Successfully placed {successful_orders}/{len(new_orders)} risk-managed orders")
+
+            return fair_price, signals
         
         except Exception as e:
             print(f"❌ Error in enhanced trading logic with risk: {e}")
-            self.logger.error(f"Error in enhanced trading logic with risk: {e}")
+            logger.error("Error in enhanced trading logic with risk: %s", e)
+            return None, None
 
 
-    async def log_enhanced_status(self, fair_price: Optional[float]):
-        """Enhanced status logging with risk metrics"""
+    async def log_enhanced_status(self, fair_price: Optional[float], position=None,
+                                  account_value: Optional[float] = None,
+                                  signals: Optional[MarketSignals] = None):
+        """Enhanced status logging with risk metrics
+        
+        position/account_value/signals are the loop's per-iteration snapshot
+        (queried here if not given).
+        """
         if self.learning_phase_active:
             self._log_learning_progress()
             return
 
-        print("\n📊 ENHANCED STATUS REPORT WITH RISK MANAGEMENT")
-        print("-" * 50)
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
         try:
             # Account and position info
-            account_value = self.position_tracker.get_account_value()
-            position = self.position_tracker.get_position(self.config.SYMBOL)
+            if account_value is None:
+                account_value = self.position_tracker.get_account_value()
+            if position is None:
+                position = self.position_tracker.get_position(self.config.SYMBOL)
             current_orders = self.position_tracker.get_open_orders(self.config.SYMBOL)
-
-            print(f"💰 Account Value: ${account_value:.2f}")
+            size = position.size if position else 0.0  # read once, reused below
 
             if position and fair_price:
                 pnl = position.calculate_unrealized_pnl(fair_price)
-                position_pct = (abs(position.size) * fair_price / account_value * 100) if account_value > 0 else 0
-                print(f"📊 Position: {position.size:.4f} {self.config.SYMBOL} ({position_pct:.1f}% of account)")
-                print(f"💹 Unrealized PnL: ${pnl:.2f}")
-            else:
-                print("📊 Position: No position")
-                print("💹 Unrealized PnL: $0.00")
-
-            print(f"📋 Open Orders: {len(current_orders)}")
+                position_pct = (math.fabs(size) * fair_price * 100.0 / account_value) if account_value > 0.0 else 0.0
 
-            if fair_price:
-                print(f"💰 Enhanced Fair Price: ${fair_price:.5f}")
+            if debug:
+                self.logger.debug("Status: account=$%.2f position=%.4f %s orders=%d fair=%s",
+                                  account_value, size, self.config.SYMBOL,
+                                  len(current_orders), fair_price or "n/a")
 
             # Funding rate monitoring
             if self.config.ENABLE_FUNDING_ALERTS:
                 funding_rate = await self.data_manager.get_funding_rate()
                 funding_pct = funding_rate * 100
 
-                print(f"💸 Funding Rate: {funding_pct:.4f}%")
-
                 # Determine if we're earning or paying
-                if position and position.size != 0:
+                if debug and size != 0:
                     # Long position: pays funding if rate is positive, earns if negative
                     # Short position: earns funding if rate is positive, pays if negative
-                    is_long = position.size > 0
+                    is_long = size > 0
 
                     if (is_long and funding_rate > 0) or (not is_long and funding_rate < 0):
                         status = "PAYING"
-                        symbol = "➖"
                     elif (is_long and funding_rate < 0) or (not is_long and funding_rate > 0):
                         status = "EARNING"
-                        symbol = "➕"
                     else:
                         status = "NEUTRAL"
-                        symbol = "⚪"
 
                     # Calculate estimated 8-hour funding cost/income
-                    position_notional = abs(position.size) * fair_price if fair_price else 0
+                    position_notional = math.fabs(size) * fair_price if fair_price else 0
                     funding_amount = position_notional * abs(funding_rate)
-
-                    print(f"   {symbol} Position {status} funding")
-                    print(f"   Estimated 8h: ${funding_amount:.4f} {'cost' if status == 'PAYING' else 'income'}")
-                else:
-                    print(f"   ⚪ No position - no funding impact")
+                    self.logger.debug("Funding rate %.4f%% - position %s funding, estimated 8h %s: $%.4f",
+                                      funding_pct, status, 'cost' if status == 'PAYING' else 'income', funding_amount)
 
                 # Alert if funding rate is high
                 if abs(funding_rate) > self.config.HIGH_FUNDING_THRESHOLD:
-                    alert_symbol = "🔴" if abs(funding_rate) > self.config.HIGH_FUNDING_THRESHOLD * 2 else "🟡"
-                    print(f"   {alert_symbol} HIGH FUNDING ALERT: {funding_pct:.4f}% (threshold: {self.config.HIGH_FUNDING_THRESHOLD*100:.4f}%)")
-
-                    if funding_rate > 0:
-                        print(f"   💡 Longs paying shorts - consider short bias")
-                    else:
-                        print(f"   💡 Shorts paying longs - consider long bias")
+                    self.logger.warning("High funding alert: %.4f%% (threshold: %.4f%%) - %s",
+                                        funding_pct, self.config.HIGH_FUNDING_THRESHOLD * 100,
+                                        "longs paying shorts, consider short bias" if funding_rate > 0
+                                        else "shorts paying longs, consider long bias")
             
             # Enhanced microstructure summary
-            signals = self.microstructure.get_current_signals()
-            print(f"🧠 Microstructure Analysis:")
-            print(f"   - Flow Confidence: {signals.flow_confidence:.3f}")
-            print(f"   - Overall Momentum: {signals.overall_momentum:.3f}")
-            print(f"   - Adverse Risk: {signals.adverse_selection_risk:.3f}")
-            print(f"   - Volume Imbalance: {signals.volume_imbalance:.3f}")
-
-            # Order Flow Pressure Analysis
-            if hasattr(self.strategy, 'last_flow_imbalance') and hasattr(self.strategy, 'last_flow_adjustment'):
-                flow_imbalance = self.strategy.last_flow_imbalance
-                flow_adjustment = self.strategy.last_flow_adjustment
+            if signals is None:
+                signals = self.microstructure.get_current_signals()
+            if debug:
+                self.logger.debug("Microstructure: confidence=%.3f momentum=%.3f adverse=%.3f imbalance=%.3f",
+                                  signals.flow_confidence, signals.overall_momentum,
+                                  signals.adverse_selection_risk, signals.volume_imbalance)
 
+                # Order Flow Pressure Analysis
+                flow_imbalance = getattr(self.strategy, 'last_flow_imbalance', 0.0)
+                flow_adjustment = getattr(self.strategy, 'last_flow_adjustment', 0.0)
                 if abs(flow_imbalance) > 0.01 or abs(flow_adjustment) > 0.001:
-                    print(f"🌊 Order Flow Pressure:")
-                    print(f"   - Flow Imbalance: {flow_imbalance:+.3f} ({flow_imbalance*100:+.1f}%)")
-
-                    # Visual indicator
-                    if flow_imbalance > 0.3:
-                        flow_status = "🟢 Strong BUY pressure"
-                    elif flow_imbalance > 0.1:
-                        flow_status = "🟩 Moderate BUY pressure"
-                    elif flow_imbalance < -0.3:
-                        flow_status = "🔴 Strong SELL pressure"
-                    elif flow_imbalance < -0.1:
-                        flow_status = "🟥 Moderate SELL pressure"
-                    else:
-                        flow_status = "⚪ Neutral flow"
-
-                    print(f"   - Flow Status: {flow_status}")
-                    print(f"   - Price Adjustment: ${flow_adjustment:+.5f}")
-
-                    if flow_adjustment > 0:
-                        print(f"   - Direction: ↑ Adjusting price UP")
-                    elif flow_adjustment < 0:
-                        print(f"   - Direction: ↓ Adjusting price DOWN")
-                    else:
-                        print(f"   - Direction: ⚪ No adjustment")
+                    self.logger.debug("Order flow pressure: imbalance=%+.3f price_adjustment=%+.5f",
+                                      flow_imbalance, flow_adjustment)
 
             # NEW: Risk-specific logging
             current_price = fair_price or 0
-            if position and hasattr(self.strategy, 'get_risk_status') and current_price > 0:
-                risk_status = self.strategy.get_risk_status(position, current_price)
+            risk_status = None
+            if position and self._get_risk_status is not None and current_price > 0:
+                risk_status = self._get_risk_status(position, current_price)
 
                 if not risk_status.get('no_position'):
-                    print(f"🛡️  Risk Management Status:")
-
                     stop_loss_price = risk_status.get('stop_loss_price', 0)
-                    profit_target_price = risk_status.get('profit_target_price', 0)
 
                     if stop_loss_price > 0:
-                        distance_to_stop = ((current_price - stop_loss_price) / current_price * 100) if position.size > 0 else ((stop_loss_price - current_price) / current_price * 100)
-                        print(f"   - Stop-Loss: ${stop_loss_price:.5f} (distance: {distance_to_stop:.2f}%)")
+                        distance_to_stop = ((current_price - stop_loss_price) / current_price * 100) if size > 0 else ((stop_loss_price - current_price) / current_price * 100)
 
                         # WARNING if close to stop
                         if abs(distance_to_stop) < 0.5:
-                            print(f"   ⚠️  CLOSE TO STOP-LOSS!")
-
-                    if profit_target_price > 0:
-                        print(f"   - Profit Target: ${profit_target_price:.5f}")
-            
-            # Time since trading started
-            if hasattr(self, 'trading_start_time') and self.trading_start_time:
-                trading_duration = time.time() - self.trading_start_time
-                print(f"⏰ Trading Duration: {trading_duration/60:.1f} minutes")
+                            self.logger.warning("Close to stop-loss: $%.5f (distance: %.2f%%)",
+                                                stop_loss_price, distance_to_stop)
             
-            # Log to main logger as well
-            if position:
-                self.logger.info(f"Enhanced+Risk: ${account_value:.0f} | Position: {position.size:.4f} ({position_pct:.1f}%) | PnL: ${pnl:.2f} | Orders: {len(current_orders)} | Fair: ${fair_price:.5f}")
+            # One summary line per loop
+            trading_minutes = (time.monotonic() - self.trading_start_time) / 60 if self.trading_start_time else 0.0
+            if position and fair_price:
+                self.logger.info("Enhanced+Risk: $%.0f | Position: %.4f (%.1f%%) | PnL: $%.2f | Orders: %d | Fair: $%.5f | %.1fmin",
+                                 account_value, size, position_pct, pnl, len(current_orders), fair_price, trading_minutes)
             else:
-                self.logger.info(f"Enhanced+Risk: ${account_value:.0f} | No position | Orders: {len(current_orders)} | Fair: ${fair_price:.5f}")
+                self.logger.info("Enhanced+Risk: $%.0f | No position | Orders: %d | Fair: $%.5f | %.1fmin",
+                                 account_value, len(current_orders), fair_price or 0.0, trading_minutes)
 
             # Log metrics to InfluxDB for Grafana dashboard
             metrics = {
                 'fair_price': fair_price or 0,
                 'account_value': account_value,
-                'position_size': position.size if position else 0,
+                'position_size': size,
                 'unrealized_pnl': pnl if position and fair_price else 0,
                 'spread_pct': orderbook.get('spread_pct', 0) if 'orderbook' in locals() else 0,
                 'open_orders': len(current_orders)
@@ -872,18 +1091,17 @@ class EnhancedHyperliquidMarketMaker:
                 self.metrics_logger.log_signals(signals)
 
             # Log risk metrics if position exists
-            if position and hasattr(self.strategy, 'get_risk_status') and current_price > 0:
-                risk_status = self.strategy.get_risk_status(position, current_price)
-                if not risk_status.get('no_position'):
-                    self.metrics_logger.log_risk_metrics(risk_status)
+            if risk_status and not risk_status.get('no_position'):
+                self.metrics_logger.log_risk_metrics(risk_status)
 
-            # Log pricing engine metrics
-            if hasattr(self.strategy, '_pricing_metadata'):
-                self.metrics_logger.log_pricing_metrics(self.strategy._pricing_metadata)
+            # Log pricing engine metrics (set once the strategy has priced orders)
+            pricing_metadata = getattr(self.strategy, '_pricing_metadata', None)
+            if pricing_metadata is not None:
+                self.metrics_logger.log_pricing_metrics(pricing_metadata)
 
         except Exception as e:
             print(f"❌ Error logging enhanced status: {e}")
-            self.logger.error(f"Error logging enhanced status: {e}")
+            self.logger.error("Error logging enhanced status: %s", e)
 
 
     async def enhanced_trading_loop(self):
@@ -897,106 +1115,190 @@ class EnhancedHyperliquidMarketMaker:
         
         self.logger.info("Starting enhanced main loop...")
         loop_count = 0
-        last_learning_log = 0
+        empty_ticks = 0  # Consecutive iterations without data
+        error_streak = 0  # Consecutive iterations that raised
+        overruns = 0  # Consecutive iterations that missed their deadline
+        
+        # Hot-path lookups bound once (the data source is fixed after initialize;
+        # self._tick is rebound when learning ends, so it is read per iteration)
+        config = self.config
+        sleep = asyncio.sleep
+        gather = asyncio.gather
+        get_market_data = self.data_manager.get_orderbook if self._ws_enabled else self.update_market_data
+        update_positions_and_orders = self.update_positions_and_orders
+        logger = self.logger
+        
+        # WebSocket books can arrive far faster than the account needs
+        # polling, so the REST position/order sync runs on its own interval
+        sync_interval = config.ACCOUNT_SYNC_INTERVAL if self._ws_enabled else 0.0
+        
+        # Iterations run on a fixed cadence: each sleep only covers what is
+        # left of the tick's interval after the work it took
+        clock = asyncio.get_running_loop().time
+        next_tick = clock()
+        next_sync = next_tick
+        
+        # Per-iteration timings, summarised every LATENCY_REPORT_INTERVAL
+        perf_ns = time.perf_counter_ns
+        fetch_ns = []
+        tick_ns = []
+        next_report = next_tick + config.LATENCY_REPORT_INTERVAL
         
         while self.running:
             try:
                 loop_count += 1
-                current_time = time.time()
                 
-                # Check if learning phase should end
-                if self.learning_phase_active and self._check_learning_phase_completion():
-                    self._end_learning_phase()
-                
-                if self.learning_phase_active:
-                    print(f"\n🎓 Enhanced Learning Loop #{loop_count}")
-                else:
-                    print(f"\n💹 Enhanced Trading Loop #{loop_count}")
-                
-                # WebSocket status check
-                ws_status = getattr(self.data_manager, 'real_time_enabled', 'Unknown')
-                print(f"🔍 WebSocket status: {ws_status}")
-                
-                # Get market data with enhanced analysis
-                if hasattr(self.data_manager, 'real_time_enabled') and self.data_manager.real_time_enabled:
-                    if not self.learning_phase_active:
-                        print("📡 Using real-time data with enhanced analysis")
-                    orderbook = await self.data_manager.get_orderbook()
-                    if orderbook and not self.learning_phase_active:
-                        print(f"📊 Enhanced orderbook analysis: Mid=${orderbook.get('mid_price', 0):.5f}")
+                # Get market data with enhanced analysis while positions and
+                # orders refresh (independent round trips, both handle their errors)
+                t0 = perf_ns()
+                if clock() >= next_sync:
+                    next_sync = clock() + sync_interval
+                    orderbook, _ = await gather(get_market_data(), update_positions_and_orders())
                 else:
-                    if not self.learning_phase_active:
-                        print("📊 Using REST API with enhanced analysis")
-                    orderbook = await self.update_market_data()
+                    orderbook = await get_market_data()
+                t1 = perf_ns()
                 
                 if not orderbook:
-                    print("⚠️ No market data - waiting before next iteration")
-                    sleep_time = (self.config.LEARNING_PHASE_UPDATE_INTERVAL if self.learning_phase_active 
-                                else self.config.UPDATE_INTERVAL)
-                    await asyncio.sleep(sleep_time)
+                    # Exponential backoff so a stalled feed isn't polled at full rate
+                    base_interval = (config.LEARNING_PHASE_UPDATE_INTERVAL if self.learning_phase_active 
+                                     else config.UPDATE_INTERVAL)
+                    sleep_time = min(base_interval * 2 ** empty_ticks, config.MAX_BACKOFF_INTERVAL)
+                    empty_ticks += 1
+                    print(f"⚠️ No market data - retrying in {sleep_time:.2f}s")
+                    await sleep(sleep_time)
+                    next_tick = clock()
                     continue
+                empty_ticks = 0
                 
-                # Update positions and orders
-                await self.update_positions_and_orders()
-                
-                # Execute enhanced trading logic (only if not in learning phase)
-                if not self.learning_phase_active:
-                    await self.execute_enhanced_trading_logic(orderbook)
+                # Phase-specific work; returns the tick interval
+                interval = await self._tick(orderbook, loop_count)
+                fetch_ns.append(t1 - t0)
+                tick_ns.append(perf_ns() - t1)
+                error_streak = 0
                 
-                # Calculate enhanced fair price for status
-                fair_price = None
-                if not self.learning_phase_active:
-                    recent_trades_list = list(self.microstructure.trade_history) if hasattr(self.microstructure, 'trade_history') else []
-                    recent_trades_dicts = [
-                        {'price': t.price, 'size': t.size, 'side': 'B' if t.is_aggressive_buy else 'A', 'timestamp': t.timestamp}
-                        for t in recent_trades_list
-                    ] if recent_trades_list else []
-                    fair_price = self.strategy.calculate_fair_price(orderbook, recent_trades_dicts)
+                if clock() >= next_report:
+                    self._report_latency(fetch_ns, tick_ns)
+                    fetch_ns.clear()
+                    tick_ns.clear()
+                    next_report = clock() + config.LATENCY_REPORT_INTERVAL
                 
-                # Log status
-                if self.learning_phase_active:
-                    if current_time - last_learning_log >= self.config.LEARNING_PHASE_LOG_INTERVAL:
-                        await self.log_enhanced_status(fair_price)
-                        last_learning_log = current_time
-                else:
-                    await self.log_enhanced_status(fair_price)
-                
-                # Adaptive sleep timing
-                if self.learning_phase_active:
-                    sleep_time = self.config.LEARNING_PHASE_UPDATE_INTERVAL
-                    if loop_count % 15 == 0:
-                        print(f"⏰ Enhanced learning mode - waiting {sleep_time}s...")
+                next_tick += interval
+                residual = next_tick - clock()
+                if residual > 0:
+                    overruns = 0
+                    await sleep(residual)
                 else:
-                    sleep_time = (self.config.UPDATE_INTERVAL * 2 if ws_status else self.config.UPDATE_INTERVAL)
-                    print(f"⏰ Enhanced trading mode - waiting {sleep_time}s...")
-                
-                print("=" * (45 + len(str(loop_count))))
-                await asyncio.sleep(sleep_time)
+                    if interval > 0:
+                        overruns += 1
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Loop #%d overran its interval by %.3fs", loop_count, -residual)
+                        if overruns == config.LOOP_OVERRUN_WARN_TICKS:
+                            logger.warning("Trading loop falling behind: %d consecutive ticks over the %.3fs interval",
+                                           overruns, interval)
+                    next_tick = clock()
                 
             except Exception as e:
+                error_streak += 1
                 print(f"\n❌ ERROR IN ENHANCED MAIN LOOP: {e}")
-                self.logger.error(f"Error in enhanced main loop: {e}")
-                await asyncio.sleep(self.config.UPDATE_INTERVAL * 5)
+                self.logger.error("Error in enhanced main loop: %s", e)
+                
+                # Circuit breaker: a tick that keeps failing should stop the bot,
+                # not leave it looking alive while it stalls
+                if error_streak > config.MAX_CONSECUTIVE_ERRORS:
+                    print(f"🛑 {error_streak} consecutive loop errors - stopping bot")
+                    self.logger.critical("Stopping after %d consecutive loop errors: %s", error_streak, e)
+                    self.running = False
+                    break
+                
+                sleep_time = min(config.UPDATE_INTERVAL * (1 << error_streak),
+                                 config.MAX_BACKOFF_INTERVAL)
+                await sleep(sleep_time)
+                next_tick = clock()
+    
+    def _report_latency(self, fetch_ns: List[int], tick_ns: List[int]):
+        """Send loop latency percentiles to the metrics logger
+        
+        fetch is the market data/account round trip, tick the phase work.
+        """
+        latency = {'iterations': len(tick_ns)}
+        for name, samples in (('fetch', fetch_ns), ('tick', tick_ns)):
+            p50, p99 = np.percentile(samples, (50, 99)) / 1e3
+            latency[f'{name}_p50_us'] = p50
+            latency[f'{name}_p99_us'] = p99
+            latency[f'{name}_max_us'] = max(samples) / 1e3
+        
+        self.metrics_logger.log_latency_metrics(latency)
+        self.logger.debug("Loop latency over %d iterations: fetch p50=%.0fus p99=%.0fus, tick p50=%.0fus p99=%.0fus",
+                          latency['iterations'], latency['fetch_p50_us'], latency['fetch_p99_us'],
+                          latency['tick_p50_us'], latency['tick_p99_us'])
+    
+    async def _learning_tick(self, orderbook: Dict, loop_count: int) -> float:
+        """One learning-phase iteration (samples are collected by the feed)"""
+        self.logger.debug("Learning loop #%d (WebSocket: %s)", loop_count, self._ws_enabled)
+        
+        # Check if learning phase should end - this iteration already trades
+        if self._check_learning_phase_completion():
+            await self._end_learning_phase()
+            return await self._trading_tick(orderbook, loop_count)
+        
+        current_time = time.monotonic()
+        if current_time - self._last_learning_log >= self.config.LEARNING_PHASE_LOG_INTERVAL:
+            await self.log_enhanced_status(None)
+            self._last_learning_log = current_time
+        
+        # WebSocket mode is paced by the orderbook queue, so no extra sleep
+        return 0.0 if self._ws_enabled else self.config.LEARNING_PHASE_UPDATE_INTERVAL
     
-    def signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
+    async def _trading_tick(self, orderbook: Dict, loop_count: int) -> float:
+        """One trading iteration: execute the strategy and log status"""
+        self.logger.debug("Trading loop #%d (WebSocket: %s)", loop_count, self._ws_enabled)
+        
+        # Per-iteration snapshot shared by trading logic and status
+        position = self.position_tracker.get_position(self.config.SYMBOL)
+        account_value = self.position_tracker.get_account_value()
+        fair_price, signals = await self.execute_enhanced_trading_logic(orderbook, position, account_value)
+        
+        # Trading logic skipped the fair price (early exit) - compute it for status
+        if fair_price is None:
+            fair_price = self.strategy.calculate_fair_price(orderbook, self._recent_trade_dicts())
+        
+        # A stop-loss exit clears the tracked position
+        position = self.position_tracker.get_position(self.config.SYMBOL)
+        await self.log_enhanced_status(fair_price, position, account_value, signals)
+        
+        # WebSocket mode is paced by the orderbook queue, so no extra sleep
+        return 0.0 if self._ws_enabled else self.config.UPDATE_INTERVAL
+    
+    def signal_handler(self, signum):
+        """Handle shutdown signals
+        
+        Runs as an event loop callback, so the main loop task is cancelled at
+        its current await instead of being interrupted out-of-band.
+        """
         print(f"\n🛑 Received signal {signum}, shutting down enhanced bot...")
-        self.logger.info(f"Received signal {signum}, shutting down enhanced bot...")
+        self.logger.info("Received signal %s, shutting down enhanced bot...", signum)
         self.running = False
+        if self._main_task is not None:
+            self._main_task.cancel()
     
     async def run(self):
         """Run the enhanced market maker"""
-        # Setup signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        # Setup signal handlers on the event loop (signal.signal on Windows,
+        # which has no loop signal handlers - the callback is still loop-scheduled)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.signal_handler, sig)
+            except NotImplementedError:
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(self.signal_handler, signum))
         
+        ws_task = None
         try:
             await self.initialize()
             self.running = True
             
             # Start WebSocket listener as background task
-            ws_task = None
-            if hasattr(self.data_manager, 'real_time_enabled') and self.data_manager.real_time_enabled:
+            if self._ws_enabled:
                 print("📡 Starting enhanced real-time WebSocket feeds...")
                 ws_task = asyncio.create_task(self.data_manager.start_real_time_feeds())
                 print("📡 Enhanced real-time data feeds started")
@@ -1004,7 +1306,12 @@ class EnhancedHyperliquidMarketMaker:
                 print("⚠️ WebSocket not available, using enhanced REST API analysis")
             
             # Start enhanced main loop
-            await self.enhanced_trading_loop()
+            self._main_task = asyncio.create_task(self.enhanced_trading_loop())
+            try:
+                await self._main_task
+            except asyncio.CancelledError:
+                if self.running:  # cancelled from outside, not by a shutdown signal
+                    raise
             
         finally:
             # Cancel WebSocket task if running
@@ -1026,73 +1333,90 @@ if __name__ == "__main__":
     print("🎓 Learning Phase + 📊 Orderbook Analysis + 🧠 Microstructure")
     print("=" * 60)
     
-    # Installation check
-    try:
-        import hyperliquid
-        from eth_account import Account
-        import numpy as np
-        import websockets
+    # Installation check (find_spec locates packages without importing them);
+    # skipped under python -O
+    if __debug__:
+        missing = [name for name in ('hyperliquid', 'eth_account', 'numpy', 'websockets')
+                   if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"❌ Missing required packages: {', '.join(missing)}")
+            print("💡 Run: pip install hyperliquid-python-sdk eth-account numpy websockets")
+            sys.exit(1)
         print("✅ Required packages detected")
-    except ImportError as e:
-        print(f"❌ Missing required packages: {e}")
-        print("💡 Run: pip install hyperliquid-python-sdk eth-account numpy websockets")
-        exit(1)
     
     bot = EnhancedHyperliquidMarketMaker()
     
+    # Startup banner, emitted in a single write
+    buf = []
+    
     # Enhanced safety checks
-    print("\n🔍 ENHANCED SAFETY CHECKS")
-    print("-" * 30)
+    buf.append("\n🔍 ENHANCED SAFETY CHECKS")
+    buf.append("-" * 30)
     
     if not bot.config.PRIVATE_KEY:
-        print("⚠️  No private key found - set HYPERLIQUID_PRIVATE_KEY environment variable")
-        print("📝 Will run in read-only mode with enhanced analysis")
+        buf.append("⚠️  No private key found - set HYPERLIQUID_PRIVATE_KEY environment variable")
+        buf.append("📝 Will run in read-only mode with enhanced analysis")
     else:
-        print("✅ Private key configured")
+        buf.append("✅ Private key configured")
     
     if not bot.config.ENABLE_TRADING:
-        print("⚠️  TRADING IS DISABLED - Set ENABLE_TRADING=True in config to enable real trading")
-        print("📝 Currently running in enhanced paper trading mode")
+        buf.append("⚠️  TRADING IS DISABLED - Set ENABLE_TRADING=True in config to enable real trading")
+        buf.append("📝 Currently running in enhanced paper trading mode")
     else:
-        print("🚨 LIVE TRADING ENABLED with enhanced risk management")
+        buf.append("🚨 LIVE TRADING ENABLED with enhanced risk management")
     
     if bot.config.TESTNET:
-        print("🧪 Running on TESTNET with enhanced features")
+        buf.append("🧪 Running on TESTNET with enhanced features")
     else:
-        print("🚀 Running on MAINNET with enhanced features")
+        buf.append("🚀 Running on MAINNET with enhanced features")
     
-    print(f"💱 Trading symbol: {bot.config.SYMBOL}")
-    print(f"🎓 Learning phase: {'ENABLED' if bot.config.ENABLE_LEARNING_PHASE else 'DISABLED'}")
+    buf.append(f"💱 Trading symbol: {bot.config.SYMBOL}")
+    buf.append(f"🎓 Learning phase: {'ENABLED' if bot.config.ENABLE_LEARNING_PHASE else 'DISABLED'}")
     if bot.config.ENABLE_LEARNING_PHASE:
-        print(f"   Duration: {bot.config.LEARNING_PHASE_DURATION/60:.1f} minutes")
-    print(f"📊 Update interval: {bot.config.UPDATE_INTERVAL}s")
-    print(f"🧠 Microstructure analysis: ENHANCED")
-    print(f"📈 Orderbook analysis: ENABLED")
-    print(f"🎯 Adverse selection protection: ACTIVE")
-    print(f"🌊 Dynamic spread calculation: ENABLED")
+        buf.append(f"   Duration: {bot.config.LEARNING_PHASE_DURATION/60:.1f} minutes")
+    buf.append(f"📊 Update interval: {bot.config.UPDATE_INTERVAL}s")
+    buf.append(f"🧠 Microstructure analysis: ENHANCED")
+    buf.append(f"📈 Orderbook analysis: ENABLED")
+    buf.append(f"🎯 Adverse selection protection: ACTIVE")
+    buf.append(f"🌊 Dynamic spread calculation: ENABLED")
     
-    print("\n" + "=" * 60)
-    print("🎓 ENHANCED LEARNING PHASE WORKFLOW")
-    print("   1. 📚 Observe market for comprehensive data collection")
-    print("   2. 📊 Analyze orderbook patterns and liquidity distribution")
-    print("   3. ⚖️  Measure volume imbalances and spread dynamics")
-    print("   4. 🎯 Calibrate adverse selection detection thresholds")
-    print("   5. 🧠 Establish microstructure analysis baselines")
-    print("   6. 🚀 Begin intelligent order placement with enhanced algorithms")
-    print("")
-    print("💹 ENHANCED TRADING FEATURES")
-    print("   ✅ Smart fair price calculation using volume-weighted analysis")
-    print("   ✅ Dynamic spread adjustment based on market conditions")
-    print("   ✅ Orderbook gap detection for optimal order placement")
-    print("   ✅ Adverse selection risk assessment and protection")
-    print("   ✅ Market condition classification (CALM/TRENDING/VOLATILE/ILLIQUID)")
-    print("   ✅ Liquidity concentration analysis")
-    print("   ✅ Position-aware order sizing and skewing")
-    print("   ✅ Microstructure-informed cancellation logic")
-    print("=" * 60)
+    buf.append("\n" + "=" * 60)
+    buf.append("🎓 ENHANCED LEARNING PHASE WORKFLOW")
+    buf.append("   1. 📚 Observe market for comprehensive data collection")
+    buf.append("   2. 📊 Analyze orderbook patterns and liquidity distribution")
+    buf.append("   3. ⚖️  Measure volume imbalances and spread dynamics")
+    buf.append("   4. 🎯 Calibrate adverse selection detection thresholds")
+    buf.append("   5. 🧠 Establish microstructure analysis baselines")
+    buf.append("   6. 🚀 Begin intelligent order placement with enhanced algorithms")
+    buf.append("")
+    buf.append("💹 ENHANCED TRADING FEATURES")
+    buf.append("   ✅ Smart fair price calculation using volume-weighted analysis")
+    buf.append("   ✅ Dynamic spread adjustment based on market conditions")
+    buf.append("   ✅ Orderbook gap detection for optimal order placement")
+    buf.append("   ✅ Adverse selection risk assessment and protection")
+    buf.append("   ✅ Market condition classification (CALM/TRENDING/VOLATILE/ILLIQUID)")
+    buf.append("   ✅ Liquidity concentration analysis")
+    buf.append("   ✅ Position-aware order sizing and skewing")
+    buf.append("   ✅ Microstructure-informed cancellation logic")
+    buf.append("=" * 60)
+    sys.stdout.write("\n".join(buf) + "\n")
+    sys.stdout.flush()
+    
+    # Faster event loop when available (uvloop does not support Windows)
+    run_loop = asyncio.run
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        if hasattr(uvloop, 'run'):
+            run_loop = uvloop.run  # uvloop >= 0.18, no global loop policy
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        print("⚡ Using uvloop event loop")
     
     try:
-        asyncio.run(bot.run())
+        run_loop(bot.run())
     except KeyboardInterrupt:
         print("\n👋 Enhanced bot stopped by user")
     except Exception as e:
@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
+import math
 import time
 import logging
 import numpy as np
@@ -18,6 +19,9 @@ from analysis.orderbook_analyzer import OrderbookAnalyzer, OrderbookImbalance, O
 import logging
 from typing import Dict, List, Tuple, Optional
 
+# Number of most recent trades the flow-adjusted price looks at
+FLOW_TRADE_WINDOW = 20
+
 class DynamicPricingEngine:
     """
     Sophisticated dynamic bid/ask calculation using:
@@ -307,8 +311,10 @@ class DynamicPricingEngine:
                 spread = ask_price - bid_price
                 skew_adjustment = spread * inventory_skew
 
-                bid_price += skew_adjustment
-                ask_price += skew_adjustment
+                # Shift both quotes against the inventory: lower when long so
+                # the ask fills first, higher when short so the bid does
+                bid_price -= skew_adjustment
+                ask_price -= skew_adjustment
 
                 print(f"   📊 Inventory skew: {inventory_skew*100:.2f}%")
 
@@ -369,10 +375,13 @@ class EnhancedMarketMakingStrategy:
         print(f"   - Orderbook-based decision making: ENABLED")
         print(f"   - Flow-adjusted pricing: ENABLED")
 
-    def update_baselines_from_learning(self, learning_stats: Dict):
-        """Update strategy baselines from learning phase"""
+    def update_baselines_from_learning(self, learning_stats: Dict, baselines: Optional[Dict] = None):
+        """Update strategy baselines from learning phase
+        
+        baselines may be passed in precomputed by OrderbookAnalyzer.compute_baselines.
+        """
         print("🎓 Strategy: Updating baselines from learning phase...")
-        self.orderbook_analyzer.update_baselines_from_learning(learning_stats)
+        self.orderbook_analyzer.update_baselines_from_learning(learning_stats, baselines)
 
     def calculate_microprice(self, orderbook: Dict) -> Optional[float]:
         """Calculate microprice - a more sophisticated fair price estimate
@@ -418,7 +427,8 @@ class EnhancedMarketMakingStrategy:
                 return orderbook.get('mid_price')
             return None
 
-    def calculate_flow_adjusted_price(self, orderbook: Dict, recent_trades: List[Dict] = None) -> Tuple[Optional[float], float, float]:
+    def calculate_flow_adjusted_price(self, orderbook: Dict, recent_trades: List[Dict] = None,
+                                      microprice: Optional[float] = None) -> Tuple[Optional[float], float, float]:
         """Calculate flow-adjusted price using order flow pressure
 
         Analyzes recent aggressive trades (market orders) to adjust fair price:
@@ -428,6 +438,7 @@ class EnhancedMarketMakingStrategy:
         Args:
             orderbook: Current orderbook data
             recent_trades: List of recent trades with 'side' and 'size' fields
+            microprice: Precomputed microprice (calculated here if not given)
 
         Returns:
             Tuple of (adjusted_price, flow_imbalance, flow_adjustment_dollars)
@@ -436,7 +447,8 @@ class EnhancedMarketMakingStrategy:
             - flow_adjustment_dollars: Dollar adjustment applied
         """
         # Start with microprice
-        microprice = self.calculate_microprice(orderbook)
+        if microprice is None:
+            microprice = self.calculate_microprice(orderbook)
         if microprice is None:
             return None, 0.0, 0.0
 
@@ -445,8 +457,8 @@ class EnhancedMarketMakingStrategy:
             return microprice, 0.0, 0.0
 
         try:
-            # Get last 20 trades (or all if less than 20)
-            last_trades = recent_trades[-20:]
+            # Get last FLOW_TRADE_WINDOW trades (or all if fewer)
+            last_trades = recent_trades[-FLOW_TRADE_WINDOW:]
 
             # Sum aggressive buy and sell volumes
             buy_volume = 0.0
@@ -489,7 +501,8 @@ class EnhancedMarketMakingStrategy:
             self.logger.error(f"Error calculating flow adjusted price: {e}")
             return microprice, 0.0, 0.0
 
-    def calculate_depth_pressure_price(self, orderbook: Dict) -> Tuple[Optional[float], float]:
+    def calculate_depth_pressure_price(self, orderbook: Dict,
+                                       microprice: Optional[float] = None) -> Tuple[Optional[float], float]:
         """Calculate price adjustment based on bid/ask depth imbalance
 
         Deep bid side → upward pressure → higher price
@@ -497,13 +510,15 @@ class EnhancedMarketMakingStrategy:
 
         Args:
             orderbook: Current orderbook data
+            microprice: Precomputed microprice (calculated here if not given)
 
         Returns:
             Tuple of (pressure_adjusted_price, depth_pressure)
             - pressure_adjusted_price: Microprice adjusted for depth
             - depth_pressure: -1 to +1 (negative = ask heavy, positive = bid heavy)
         """
-        microprice = self.calculate_microprice(orderbook)
+        if microprice is None:
+            microprice = self.calculate_microprice(orderbook)
         if microprice is None:
             return None, 0.0
 
@@ -576,14 +591,14 @@ class EnhancedMarketMakingStrategy:
 
             # Component 2: Flow-adjusted price (30% weight)
             flow_price, flow_imbalance, flow_adjustment = self.calculate_flow_adjusted_price(
-                orderbook, recent_trades
+                orderbook, recent_trades, microprice
             )
             components['flow_price'] = flow_price if flow_price else microprice
             components['flow_imbalance'] = flow_imbalance
             components['flow_adjustment'] = flow_adjustment
 
             # Component 3: Depth-pressure price (20% weight)
-            pressure_price, depth_pressure = self.calculate_depth_pressure_price(orderbook)
+            pressure_price, depth_pressure = self.calculate_depth_pressure_price(orderbook, microprice)
             components['pressure_price'] = pressure_price if pressure_price else microprice
             components['depth_pressure'] = depth_pressure
 
@@ -699,40 +714,72 @@ class EnhancedMarketMakingStrategy:
     def should_cancel_orders(self, current_orders: List, fair_price: float, signals: Optional[MarketSignals] = None) -> List:
         """Determine which orders should be cancelled based on price deviation from fair value
 
+        Orders older than MAX_ORDER_AGE_SECONDS are also cancelled when
+        ENABLE_AGGRESSIVE_REFRESH is on. The orders are read into price/age
+        columns once and checked with vectorized masks.
+
         Args:
             current_orders: List of currently open orders
             fair_price: Current calculated fair price
             signals: Optional market signals
 
         Returns:
-            List of orders that should be cancelled
+            List of order IDs that should be cancelled
         """
-        orders_to_cancel = []
-
         if not current_orders or not fair_price:
-            return orders_to_cancel
+            return []
 
         # Cancel threshold: orders that are more than 0.5% away from fair price
         cancel_threshold_pct = getattr(self.config, 'ORDER_CANCEL_THRESHOLD_PCT', 0.5) / 100
 
-        for order in current_orders:
-            try:
-                order_price = order.get('limit_px', 0)
-                if order_price == 0:
-                    continue
+        try:
+            n = len(current_orders)
+            prices = np.fromiter((order.price for order in current_orders), dtype=np.float64, count=n)
+            created_at = np.fromiter((order.created_at for order in current_orders), dtype=np.float64, count=n)
+
+            # Cancel if too far from fair price (orders without a price are skipped)
+            cancel_mask = (prices > 0) & (np.abs(prices - fair_price) > cancel_threshold_pct * fair_price)
+            if getattr(self.config, 'ENABLE_AGGRESSIVE_REFRESH', False):
+                cancel_mask |= (time.time() - created_at) > self.config.MAX_ORDER_AGE_SECONDS
+
+            return [current_orders[i].order_id for i in np.flatnonzero(cancel_mask)]
+
+        except Exception as e:
+            self.logger.error(f"Error evaluating orders for cancellation: {e}")
+            return []
 
-                # Calculate distance from fair price
-                price_deviation = abs(order_price - fair_price) / fair_price
+    def reconcile_orders(self, current_orders: List, cancel_ids: List, new_orders: List[Dict]) -> Tuple[List, List[Dict]]:
+        """Keep open orders that already quote a newly generated order
 
-                # Cancel if too far from fair price
-                if price_deviation > cancel_threshold_pct:
-                    orders_to_cancel.append(order)
+        A new order whose side, price, size and reduce-only flag match an
+        open order is dropped and that open order is taken off the cancel
+        list, so an unchanged quote is not cancelled and placed again. A
+        resized quote or a reduce-only order never matches a different order.
 
-            except Exception as e:
-                self.logger.error(f"Error evaluating order for cancellation: {e}")
-                continue
+        Returns:
+            Tuple of (cancel_ids, new_orders) after reconciliation
+        """
+        if not current_orders or not new_orders:
+            return cancel_ids, new_orders
 
-        return orders_to_cancel
+        resting = {}
+        for order in current_orders:
+            key = (order.side == 'buy', round(order.price, 8), round(order.size, 8), order.reduce_only)
+            resting.setdefault(key, []).append(order.order_id)
+
+        kept = set()
+        remaining = []
+        for order in new_orders:
+            matches = resting.get((order['is_buy'], round(order.get('limit_px', 0), 8),
+                                   round(float(order['sz']), 8), order.get('reduce_only', False)))
+            if matches:
+                kept.add(matches.pop())
+            else:
+                remaining.append(order)
+
+        if kept and cancel_ids:
+            cancel_ids = [order_id for order_id in cancel_ids if order_id not in kept]
+        return cancel_ids, remaining
 
     def find_optimal_quote_levels(self, orderbook: Dict, fair_value: float, side: str) -> Optional[float]:
         """Find optimal price level to join existing liquidity
@@ -968,12 +1015,22 @@ class RiskManagementConfig:
         if self.PARTIAL_PROFIT_LEVELS is None:
             self.PARTIAL_PROFIT_LEVELS = [0.5, 1.0, 1.5]
 
+@dataclass
+class Tick:
+    """Per-tick position snapshot shared by the risk checks"""
+    pos_size: float
+    pos_abs: float
+    pos_sign: int     # +1 long, -1 short
+    price: float
+    entry: float      # NaN when no entry is tracked
+    inv_entry: float  # 1 / entry, NaN when no entry is tracked
+
 class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
     def __init__(self, config: TradingConfig):
         super().__init__(config)
         
         # ADD THESE LINES for risk management:
-        self.position_entry_price = None
+        self.position_entry_price = math.nan
         self.position_entry_time = None
         self.highest_profit_price = None
         self.lowest_loss_price = None
@@ -1004,18 +1061,24 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
         print(f"   - Stop-loss: {self.risk_config.STOP_LOSS_PCT}%")
         print(f"   - Profit target: {self.risk_config.PROFIT_TARGET_PCT}%")
     
-    def update_position_tracking(self, position, current_price: float):
-        """Update position tracking"""
+    def update_position_tracking(self, position, current_price: float, now_ns: Optional[int] = None):
+        """Update position tracking
+
+        ``now_ns`` is the caller's per-tick ``time.monotonic_ns()`` reading; the
+        clock is only read here if none was supplied and an entry is recorded.
+        """
         if not position or position.size == 0:
-            self.position_entry_price = None
+            self.position_entry_price = math.nan
+            self.position_entry_time = None
             self.stop_loss_price = None
             self.profit_target_price = None
             if hasattr(self, 'profit_levels_hit'):
                 self.profit_levels_hit.clear()
             return
         
-        if self.position_entry_price is None:
-            self.position_entry_price = getattr(position, 'entry_price', current_price)
+        if math.isnan(self.position_entry_price):
+            self.position_entry_price = getattr(position, 'entry_price', 0.0) or current_price
+            self.position_entry_time = now_ns if now_ns is not None else time.monotonic_ns()
             
             if position.size > 0:  # Long
                 self.stop_loss_price = self.position_entry_price * (1 - self.risk_config.STOP_LOSS_PCT / 100)
@@ -1049,34 +1112,48 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
                     self.stop_loss_price = new_stop
                     print(f"📉 Trailing stop updated: ${self.stop_loss_price:.5f}")
     
-    def check_stop_loss_trigger(self, position, current_price: float) -> bool:
+    def _make_tick(self, position, current_price: float) -> Tick:
+        """Snapshot position size/sign and entry once for the current tick"""
+        pos_size = position.size
+        entry = self.position_entry_price
+        return Tick(
+            pos_size=pos_size,
+            pos_abs=abs(pos_size),
+            pos_sign=1 if pos_size > 0 else -1,
+            price=current_price,
+            entry=entry,
+            inv_entry=1.0 / entry if entry else math.nan
+        )
+
+    def check_stop_loss_trigger(self, position, current_price: float, tick: Optional[Tick] = None) -> bool:
         """Check if stop-loss should be triggered"""
-        if (not position or not hasattr(self, 'stop_loss_price') or 
-            not self.stop_loss_price or not self.risk_config.ENABLE_STOP_LOSS):
+        if (not position or not self.stop_loss_price or
+            not self.risk_config.ENABLE_STOP_LOSS):
             return False
-        
-        if position.size > 0:  # Long position
+
+        tick = tick or self._make_tick(position, current_price)
+        if tick.pos_sign > 0:  # Long position
             return current_price <= self.stop_loss_price
         else:  # Short position
             return current_price >= self.stop_loss_price
     
-    def check_profit_taking_trigger(self, position, current_price: float):
+    def check_profit_taking_trigger(self, position, current_price: float, tick: Optional[Tick] = None):
         """Check profit taking trigger"""
-        if (not position or not hasattr(self, 'position_entry_price') or 
-            not self.position_entry_price or not self.risk_config.ENABLE_PROFIT_TAKING):
+        if (not position or math.isnan(self.position_entry_price) or
+            not self.risk_config.ENABLE_PROFIT_TAKING):
             return None
-        
-        profit_pct = abs(current_price - self.position_entry_price) / self.position_entry_price * 100
+
+        tick = tick or self._make_tick(position, current_price)
+        profit_pct = abs(current_price - tick.entry) * tick.inv_entry * 100
         
         # Check profit levels
-        if hasattr(self, 'profit_levels_hit'):
-            for level in self.risk_config.PARTIAL_PROFIT_LEVELS:
-                if level not in self.profit_levels_hit and profit_pct >= level:
-                    self.profit_levels_hit.add(level)
-                    return abs(position.size) * 0.25  # 25% profit taking
+        for level in self.risk_config.PARTIAL_PROFIT_LEVELS:
+            if level not in self.profit_levels_hit and profit_pct >= level:
+                self.profit_levels_hit.add(level)
+                return tick.pos_abs * 0.25  # 25% profit taking
         
         if profit_pct >= self.risk_config.PROFIT_TARGET_PCT:
-            return abs(position.size)  # Full close
+            return tick.pos_abs  # Full close
         
         return None
     
@@ -1119,23 +1196,24 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
         # Negative skew = short position = push prices to encourage buying
         return skew
     
-    def generate_stop_loss_order(self, position, current_price: float):
+    def generate_stop_loss_order(self, position, current_price: float, tick: Optional[Tick] = None):
         """Generate stop-loss order - FIXED VERSION"""
-        if not self.check_stop_loss_trigger(position, current_price):
+        if position:
+            tick = tick or self._make_tick(position, current_price)
+        if not self.check_stop_loss_trigger(position, current_price, tick):
             return None
 
-        print(f"🛑 STOP-LOSS TRIGGERED!")
-        print(f"   Position: {position.size:.4f}")
-        print(f"   Current price: ${current_price:.5f}")
-        print(f"   Stop-loss price: ${self.stop_loss_price:.5f}")
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("STOP-LOSS TRIGGERED: position=%.4f current=%.5f stop=%.5f",
+                              tick.pos_size, current_price, self.stop_loss_price)
 
         # Calculate stop execution price with slippage buffer
-        if position.size > 0:  # Long position - sell at market
+        if tick.pos_sign > 0:  # Long position - sell at market
             # Use market order to ensure execution
             order = {
                 'coin': str(self.config.SYMBOL),
                 'is_buy': False,  # Sell to close long
-                'sz': float(abs(position.size)),
+                'sz': float(tick.pos_abs),
                 'limit_px': float(current_price * 0.98),  # 2% slippage buffer
                 'order_type': {'limit': {'tif': 'Ioc'}},  # Immediate or cancel
                 'reduce_only': True
@@ -1144,32 +1222,36 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
             order = {
                 'coin': str(self.config.SYMBOL),
                 'is_buy': True,  # Buy to close short
-                'sz': float(abs(position.size)),
+                'sz': float(tick.pos_abs),
                 'limit_px': float(current_price * 1.02),  # 2% slippage buffer
                 'order_type': {'limit': {'tif': 'Ioc'}},
                 'reduce_only': True
             }
 
-        print(f"🛑 Stop-loss order: {'BUY' if order['is_buy'] else 'SELL'} {order['sz']:.4f} @ ${order['limit_px']:.5f}")
+        if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Stop-loss order: %s %.4f @ %.5f",
+                              'BUY' if order['is_buy'] else 'SELL', order['sz'], order['limit_px'])
 
         return order
 
         
 
-    def generate_profit_taking_order(self, position, current_price: float):
+    def generate_profit_taking_order(self, position, current_price: float, tick: Optional[Tick] = None):
         """Generate profit taking order"""
-        close_size = self.check_profit_taking_trigger(position, current_price)
+        if position:
+            tick = tick or self._make_tick(position, current_price)
+        close_size = self.check_profit_taking_trigger(position, current_price, tick)
         if not close_size:
             return None
         
-        if position.size > 0:  # Long - sell higher
+        if tick.pos_sign > 0:  # Long - sell higher
             price = current_price * 1.0005
         else:  # Short - buy lower
             price = current_price * 0.9995
         
         return {
             'coin': self.config.SYMBOL,
-            'is_buy': position.size < 0,
+            'is_buy': tick.pos_sign < 0,
             'sz': close_size,
             'limit_px': price,
             'order_type': {'limit': {'tif': 'Gtc'}},
@@ -1205,19 +1287,23 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
         current_price = orderbook.get('mid_price', 0)
         self.update_position_tracking(position, current_price)
         
-        # Check for stop loss
-        if position and self.check_stop_loss_trigger(position, current_price):
-            stop_order = self.generate_stop_loss_order(position, current_price)
+        orders = []
+        if position:
+            tick = self._make_tick(position, current_price)
+
+            # Check for stop loss
+            stop_order = self.generate_stop_loss_order(position, current_price, tick)
             if stop_order:
                 return [stop_order]
-        
-        # Check for profit taking
-        orders = []
-        if position and self.check_profit_taking_trigger(position, current_price):
-            profit_order = self.generate_profit_taking_order(position, current_price)
+
+            # Check for profit taking
+            profit_order = self.generate_profit_taking_order(position, current_price, tick)
             if profit_order:
+                # Full close - no need for new maker quotes on this tick
+                if profit_order['sz'] >= tick.pos_abs * 0.99:
+                    return [profit_order]
                 orders.append(profit_order)
-        
+
         # Add normal orders
         normal_orders = self.generate_orders(orderbook, position, account_value, signals)
         orders.extend(normal_orders)
@@ -1231,14 +1317,14 @@ class EnhancedMarketMakingStrategyWithRisk(EnhancedMarketMakingStrategy):
 
         return {
             'position_size': position.size,
-            'entry_price': getattr(self, 'position_entry_price', 0) or 0,
+            'entry_price': 0 if math.isnan(self.position_entry_price) else self.position_entry_price,
             'current_price': current_price,
             'unrealized_pnl': position.calculate_unrealized_pnl(current_price),
-            'stop_loss_price': getattr(self, 'stop_loss_price', 0) or 0,
-            'profit_target_price': getattr(self, 'profit_target_price', 0) or 0,
+            'stop_loss_price': self.stop_loss_price or 0,
+            'profit_target_price': self.profit_target_price or 0,
             'stop_loss_distance': 0.0,
             'profit_target_distance': 0.0,
-            'profit_levels_hit': list(getattr(self, 'profit_levels_hit', set()))
+            'profit_levels_hit': list(self.profit_levels_hit)
         }
 
     def get_strategy_status(self, orderbook: Dict) -> Dict:
@@ -0,0 +1,42 @@
+import math
+import numpy as np
+
+class RollingStd:
+    """Population standard deviation over a fixed window of recent samples
+
+    Samples live in a small ring and the mean/M2 are updated in O(1) per push
+    (sliding Welford), so no arrays are allocated per update.
+    """
+
+    def __init__(self, window: int):
+        self._ring = np.empty(window)
+        self._i = 0
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self._n == len(self._ring)
+
+    def push(self, value: float):
+        """Add a sample, evicting the oldest once the window is full"""
+        ring = self._ring
+        if self._n < len(ring):
+            self._n += 1
+            delta = value - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (value - self._mean)
+        else:
+            old = ring[self._i]
+            old_mean = self._mean
+            self._mean += (value - old) / self._n
+            self._m2 += (value - old) * (value - self._mean + old - old_mean)
+            if self._m2 < 0.0:  # rounding drift
+                self._m2 = 0.0
+        ring[self._i] = value
+        self._i = (self._i + 1) % len(ring)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / self._n) if self._n else math.nan
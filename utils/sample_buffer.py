@@ -0,0 +1,142 @@
+import math
+import numpy as np
+
+class SampleBuffer:
+    """Append-only sample buffer backed by a preallocated NumPy array
+
+    Capacity doubles on overflow so appends stay amortised O(1), and the
+    retained samples are exposed as a zero-copy view for NumPy statistics.
+    With maxlen set only the newest maxlen samples are retained: storage is
+    capped at 2 * maxlen and the window is compacted to the front when the
+    array fills up, so the view stays contiguous and in insertion order.
+    Mean, std, min and max are kept up to date on every append (Welford)
+    over all samples seen, so summaries do not need to rescan the samples;
+    with running_stats=False that work is skipped and they stay NaN.
+    Supports len(), truthiness, slicing and np.array() like the plain lists
+    it replaces.
+    """
+
+    def __init__(self, dtype=np.float64, capacity: int = 4096, maxlen: int = None,
+                 running_stats: bool = True):
+        if maxlen:
+            capacity = min(capacity, 2 * maxlen)
+        self._data = np.empty(capacity, dtype=dtype)
+        self._maxlen = maxlen
+        self._running_stats = running_stats
+        self._start = 0
+        self._end = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def append(self, value):
+        """Append a single sample"""
+        if self._end == len(self._data):
+            self._make_room(1)
+        self._data[self._end] = value
+        self._end += 1
+        if self._maxlen and self._end - self._start > self._maxlen:
+            self._start += 1
+        if not self._running_stats:
+            return
+
+        self._count += 1
+        value = float(value)
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def extend(self, values):
+        """Append a batch of samples"""
+        values = np.asarray(values, dtype=self._data.dtype)
+        n_b = len(values)
+        if not n_b:
+            return
+
+        if self._running_stats:
+            # Merge the batch statistics into the running ones (Chan et al.)
+            n_a = self._count
+            self._count += n_b
+            batch_mean = float(values.mean(dtype=np.float64))
+            batch_m2 = float(((values - batch_mean) ** 2).sum(dtype=np.float64))
+            delta = batch_mean - self._mean
+            self._mean += delta * n_b / self._count
+            self._m2 += batch_m2 + delta * delta * n_a * n_b / self._count
+            self._min = min(self._min, float(values.min()))
+            self._max = max(self._max, float(values.max()))
+
+        if self._maxlen and n_b > self._maxlen:
+            values = values[-self._maxlen:]
+            n_b = self._maxlen
+        if self._end + n_b > len(self._data):
+            self._make_room(n_b)
+        self._data[self._end:self._end + n_b] = values
+        self._end += n_b
+        if self._maxlen and self._end - self._start > self._maxlen:
+            self._start = self._end - self._maxlen
+
+    def fill(self, value, count: int):
+        """Append the same sample count times"""
+        if count:
+            self.extend(np.full(count, value, dtype=self._data.dtype))
+
+    def view(self) -> np.ndarray:
+        """Retained samples as a NumPy view (no copy)"""
+        return self._data[self._start:self._end]
+
+    @property
+    def mean(self) -> float:
+        """Running mean (NaN when empty)"""
+        return self._mean if self._count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Running population standard deviation, matching np.std"""
+        return math.sqrt(self._m2 / self._count) if self._count else math.nan
+
+    @property
+    def min(self) -> float:
+        return self._min if self._count else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._max if self._count else math.nan
+
+    def _make_room(self, extra: int):
+        """Ensure extra samples fit after the retained ones"""
+        keep = self._end - self._start
+        if self._maxlen:
+            keep = max(0, min(keep, self._maxlen - extra))
+            if len(self._data) >= 2 * self._maxlen:
+                # Full-size storage: slide the window back to the front
+                self._data[:keep] = self._data[self._end - keep:self._end]
+                self._start, self._end = 0, keep
+                return
+
+        capacity = len(self._data) * 2
+        while capacity < keep + extra:
+            capacity *= 2
+        if self._maxlen:
+            capacity = min(capacity, 2 * self._maxlen)
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[:keep] = self._data[self._end - keep:self._end]
+        self._data = data
+        self._start, self._end = 0, keep
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, key):
+        return self.view()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.view()
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data.copy() if copy else data